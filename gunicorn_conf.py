@@ -0,0 +1,27 @@
+"""
+gunicorn settings for production deploys
+
+    gunicorn -c gunicorn_conf.py wsgi:app
+
+Every value can be overridden from the environment (WEB_CONCURRENCY, PORT, ...)
+without touching the start command.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# gevent workers multiplex many slow LLM/geocoder calls per process;
+# wsgi.py applies the monkey patch before the app is imported
+worker_class = 'gevent'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 1000))
+
+# Reuse client connections between chat turns
+keepalive = int(os.environ.get('KEEPALIVE', 30))
+# LLM replies can take a while - don't kill a worker mid-response
+timeout = int(os.environ.get('WORKER_TIMEOUT', 120))
+graceful_timeout = 30
+
+accesslog = '-'
@@ -5,19 +5,32 @@ Isolated from main system - imports from main codebase
 
 import sys
 import os
+import atexit
+import functools
+import hashlib
+import hmac
+import re
+import threading
+import traceback
+from datetime import datetime
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
+from flask_compress import Compress
+from geopy.geocoders import Nominatim
+from timezonefinder import TimezoneFinder
 
 # Import from main codebase
 from src.core.astro_engine import AstroEngine
 from src.core.llm_bridge import LLMBridge
-from src.utils.characters import get_all_characters, build_character_prompt, get_character_by_id, HARDCODED_CHARACTERS
+from src.utils.characters import get_all_characters, build_character_prompt, HARDCODED_CHARACTERS
 from src.utils.remedies import get_planet_remedy, get_all_planet_remedies
 from src.utils.logger import setup_logger
+from src.utils.utils import split_reply
+from src.api.json_provider import ORJSONProvider
 
 # Import local database
 from database import SimpleDatabase
@@ -323,29 +336,52 @@ LANGUAGE: User's language ONLY (with formal pronouns)
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
 app = Flask(__name__, static_folder=os.path.join(current_dir, 'static'))
+app.json = ORJSONProvider(app)
+# Brotli (gzip for clients without it) for JSON/HTML bodies over 500 bytes
+app.config.update(
+    COMPRESS_ALGORITHM=['br', 'gzip'], COMPRESS_BR_LEVEL=4, COMPRESS_LEVEL=6,
+    COMPRESS_MIN_SIZE=500
+)
+Compress(app)
 CORS(app)
 
 # Initialize components
 astro = AstroEngine()
 llm = LLMBridge()
 db = SimpleDatabase()  # Initialize database
+# Write out buffered conversations when the worker exits (restart, deploy, recycle)
+atexit.register(db.close)
 
 logger.info("Database initialized. Stats: " + str(db.get_stats()))
 
+# Shared lookup clients for /api/v1/chat/simple. TimezoneFinder loads its
+# polygon data on construction and reads from open files, so it's built once and
+# used under a lock.
+_geolocator = Nominatim(user_agent="astra-astrology", timeout=10)
+_timezone_finder = TimezoneFinder()
+_tf_lock = threading.Lock()
+
 # API Key (optional - set in Render environment)
 API_KEY = os.environ.get('ASTRA_API_KEY', None)
+_API_KEY_BYTES = API_KEY.encode('utf-8') if API_KEY else None
 
 
 def require_api_key(f):
     """Optional API key authentication"""
-    from functools import wraps
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        if not API_KEY:
-            return f(*args, **kwargs)
+    # No key configured - leave the view unwrapped
+    if not API_KEY:
+        return f
 
-        key = request.headers.get('X-API-Key') or request.headers.get('Authorization', '').replace('Bearer ', '')
-        if key != API_KEY:
+    @functools.wraps(f)
+    def decorated(*args, **kwargs):
+        # Authorization is only read when there's no X-API-Key
+        key = request.headers.get('X-API-Key')
+        if not key:
+            key = request.headers.get('Authorization', '')
+            if key[:7] == 'Bearer ':
+                key = key[7:]
+        # Constant-time compare so response timing doesn't leak the key
+        if not hmac.compare_digest(key.encode('utf-8'), _API_KEY_BYTES):
             return jsonify({"success": False, "error": "Invalid API key"}), 401
         return f(*args, **kwargs)
     return decorated
@@ -413,20 +449,27 @@ def get_prompts():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@functools.lru_cache(maxsize=1)
+def _characters_list():
+    """Character summaries for /api/v1/characters, built once (characters are static config)"""
+    characters = get_all_characters()
+    chars_list = []
+    for char_id, info in characters.items():
+        chars_list.append({
+            "id": char_id,
+            "name": info.get("name"),
+            "specialty": info.get("description"),
+            "emoji": info.get("emoji", "")
+        })
+    return chars_list
+
+
 @app.route('/api/v1/characters', methods=['GET'])
 @require_api_key
 def get_characters():
     """Get available characters"""
     try:
-        characters = get_all_characters()
-        chars_list = []
-        for char_id, info in characters.items():
-            chars_list.append({
-                "id": char_id,
-                "name": info.get("name"),
-                "specialty": info.get("description"),
-                "emoji": info.get("emoji", "")
-            })
+        chars_list = _characters_list()
         return jsonify({"success": True, "characters": chars_list, "count": len(chars_list)})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -456,6 +499,19 @@ def get_all_remedies():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+# Required /api/v1/chat fields, in the order they're reported when missing
+_CHAT_REQUIRED_FIELDS = (
+    'user_id', 'query', 'session_id', 'character',
+    'name', 'birth_date', 'birth_time', 'birth_location',
+    'latitude', 'longitude', 'timezone'
+)
+_CHARACTER_REQUIRED_FIELDS = ('id', 'name')
+
+# Birth date and time are matched together as "<date> <time>"
+_BIRTH_DMY_RE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4}) (\d{1,2}):(\d{2})\Z')  # DD/MM/YYYY HH:MM
+_BIRTH_ISO_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2}) (\d{1,2}):(\d{2})\Z')  # YYYY-MM-DD HH:MM
+
+
 @app.route('/api/v1/chat', methods=['POST'])
 @require_api_key
 def chat():
@@ -512,13 +568,8 @@ def chat():
         data = request.json
 
         # Validate REQUIRED fields (exact match with AstroVoice spec)
-        required_fields = [
-            'user_id', 'query', 'session_id', 'character',
-            'name', 'birth_date', 'birth_time', 'birth_location',
-            'latitude', 'longitude', 'timezone'
-        ]
-
-        missing_fields = [field for field in required_fields if field not in data or data[field] is None]
+        data_get = data.get
+        missing_fields = [field for field in _CHAT_REQUIRED_FIELDS if data_get(field) is None]
 
         if missing_fields:
             return jsonify({
@@ -540,8 +591,7 @@ def chat():
             }), 400
 
         # Validate character has required fields
-        character_required = ['id', 'name']
-        missing_char_fields = [f for f in character_required if f not in character_data]
+        missing_char_fields = [f for f in _CHARACTER_REQUIRED_FIELDS if f not in character_data]
         if missing_char_fields:
             return jsonify({
                 "success": False,
@@ -563,25 +613,18 @@ def chat():
         longitude = float(data['longitude'])
         timezone = data['timezone']
 
-        # Parse birth date (DD/MM/YYYY)
-        day, month, year = map(int, birth_date.split('/'))
-
-        # Parse birth time (HH:MM)
-        hour, minute = map(int, birth_time.split(':'))
+        # Parse birth date (DD/MM/YYYY) and time (HH:MM)
+        match = _BIRTH_DMY_RE.match(f"{birth_date} {birth_time}")
+        if match is None:
+            raise ValueError("birth_date must be DD/MM/YYYY and birth_time HH:MM")
+        day, month, year, hour, minute = map(int, match.groups())
 
-        # Create natal chart from provided data
-        natal_chart = astro.create_natal_chart(
+        # Natal and transit context (charts are cached per birth details / place)
+        natal_context, transit_context = astro.get_chart_context(
             name, year, month, day, hour, minute,
             birth_location, latitude, longitude, timezone
         )
 
-        # Get astrological context
-        natal_context = astro.build_natal_context(natal_chart)
-        transit_chart = astro.get_transit_chart(
-            birth_location, latitude, longitude, timezone
-        )
-        transit_context = astro.build_transit_context(transit_chart, natal_chart)
-
         # Generate response with character data and conversation history
         result = llm.generate_response(
             user_id=user_id,
@@ -616,7 +659,6 @@ def chat():
 
     except Exception as e:
         logger.error(f"AstroVoice chat endpoint failed: {e}")
-        import traceback
         traceback.print_exc()
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -644,10 +686,6 @@ def chat_simple():
     }
     """
     try:
-        from geopy.geocoders import Nominatim
-        from timezonefinder import TimezoneFinder
-        from datetime import datetime
-        
         data = request.json
         
         # Extract data
@@ -676,8 +714,7 @@ def chat_simple():
         
         # Geocode location with increased timeout
         try:
-            geolocator = Nominatim(user_agent="astra-astrology", timeout=10)
-            location = geolocator.geocode(birth_location)
+            location = _geolocator.geocode(birth_location)
             
             if not location:
                 return jsonify({
@@ -695,8 +732,8 @@ def chat_simple():
             }), 503
         
         # Get timezone
-        tf = TimezoneFinder()
-        timezone = tf.timezone_at(lat=latitude, lng=longitude)
+        with _tf_lock:
+            timezone = _timezone_finder.timezone_at(lat=latitude, lng=longitude)
         
         if not timezone:
             timezone = "UTC"
@@ -714,7 +751,6 @@ def chat_simple():
         
         # Generate session ID if not provided
         if not session_id:
-            import hashlib
             session_id = hashlib.md5(f"{user_id}{datetime.now().isoformat()}".encode()).hexdigest()[:16]
         
         # Character handling
@@ -734,33 +770,26 @@ def chat_simple():
         # Get conversation history from database for this session
         conversation_history = db.get_session_history(session_id, limit=20)
         
-        # Parse birth date (YYYY-MM-DD)
-        year, month, day = map(int, birth_date.split('-'))
-        
-        # Parse birth time (HH:MM)
-        hour, minute = map(int, birth_time.split(':'))
+        # Parse birth date (YYYY-MM-DD) and time (HH:MM)
+        match = _BIRTH_ISO_RE.match(f"{birth_date} {birth_time}")
+        if match is None:
+            raise ValueError("birth_date must be YYYY-MM-DD and birth_time HH:MM")
+        year, month, day, hour, minute = map(int, match.groups())
         
         logger.info(f"User {user_id} | Session {session_id} | Message: {message[:50]}...")
         
-        # Create natal chart
-        natal_chart = astro.create_natal_chart(
+        # Natal and transit context (charts are cached per birth details / place)
+        natal_context, transit_context = astro.get_chart_context(
             name, year, month, day, hour, minute,
             birth_location, latitude, longitude, timezone
         )
         
-        # Get astrological context
-        natal_context = astro.build_natal_context(natal_chart)
-        transit_chart = astro.get_transit_chart(
-            birth_location, latitude, longitude, timezone
-        )
-        transit_context = astro.build_transit_context(transit_chart, natal_chart)
-        
         # Build character data for LLM - lookup full character info
-        full_character_data = get_character_by_id(character_name)
+        # Read-only, so the shared dict is passed as-is (get_character_by_id copies it)
+        full_character_data = HARDCODED_CHARACTERS.get(character_name)
         if not full_character_data:
             # Fallback to general if character not found
-            full_character_data = get_character_by_id('general') or {'name': 'Astra', 'specialty': 'Vedic astrology'}
-        full_character_data['preferred_language'] = preferred_language
+            full_character_data = HARDCODED_CHARACTERS.get('general') or {'name': 'Astra', 'specialty': 'Vedic astrology'}
 
         # Override system prompt if testing a specific version
         original_prompt = llm.system_prompt
@@ -776,7 +805,8 @@ def chat_simple():
             session_id=session_id,
             character_id=character_name,
             conversation_history=conversation_history,
-            character_data=full_character_data
+            character_data=full_character_data,
+            preferred_language=preferred_language
         )
 
         # Restore original prompt
@@ -800,6 +830,7 @@ def chat_simple():
         return jsonify({
             "success": True,
             "response": response,
+            "responses": split_reply(response),
             "session_id": session_id,
             "user_id": user_id,
             "prompt_version": prompt_version
@@ -807,7 +838,6 @@ def chat_simple():
         
     except Exception as e:
         logger.error(f"Simple chat endpoint failed: {e}")
-        import traceback
         traceback.print_exc()
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -816,4 +846,13 @@ if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('DEBUG', 'false').lower() == 'true'
     logger.info(f"Starting ASTRA API on port {port}")
-    app.run(host='0.0.0.0', port=port, debug=debug)
+
+    if debug:
+        # Werkzeug dev server - single process, local development only
+        app.run(host='0.0.0.0', port=port, debug=True)
+    else:
+        # Production WSGI server - handles requests concurrently on a thread pool
+        from waitress import serve
+        serve(app, host='0.0.0.0', port=port,
+              threads=int(os.environ.get('WAITRESS_THREADS', 8)),
+              ident=None)  # don't advertise the server in a Server: header
@@ -4,205 +4,338 @@ Stores users and conversation history
 """
 import sqlite3
 import json
-from datetime import datetime
+import collections
+import queue
+import threading
+from contextlib import contextmanager
 import os
 
+# Directory the DB file lives in (render_deploy/), resolved once at import
+_DB_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# INSERT ... ON CONFLICT ... RETURNING (find_or_create_user) needs SQLite 3.35+
+MIN_SQLITE_VERSION = (3, 35, 0)
+
 
 class SimpleDatabase:
+    READER_POOL_SIZE = 4
+    STATEMENT_CACHE_SIZE = 512
+    FLUSH_INTERVAL = 0.2  # seconds before buffered conversations are written
+    FLUSH_BATCH_SIZE = 50
+    CHECKPOINT_INTERVAL = 30  # seconds between background WAL checkpoints
+
     def __init__(self, db_name="astra_render.db"):
         """Initialize database in render_deploy folder"""
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            raise RuntimeError(
+                f"SQLite {'.'.join(map(str, MIN_SQLITE_VERSION))}+ is required "
+                f"(found {sqlite3.sqlite_version})"
+            )
+
         # Store DB file in render_deploy directory
-        db_path = os.path.join(os.path.dirname(__file__), db_name)
+        db_path = os.path.join(_DB_DIR, db_name)
         self.db_name = db_path
+
+        # Single writer connection (autocommit mode), serialized by a lock
+        self._writer = sqlite3.connect(
+            db_path, check_same_thread=False, isolation_level=None,
+            cached_statements=self.STATEMENT_CACHE_SIZE
+        )
+        self._writer.execute('PRAGMA journal_mode=WAL')
+        # No checkpoints inside COMMIT - the background thread below trims the WAL instead
+        self._writer.execute('PRAGMA wal_autocheckpoint=0')
+        self._wlock = threading.Lock()
         self.init_db()
-    
+
+        # Conversations are buffered and written in batches (one commit per batch)
+        self._pending = collections.deque()
+        self._flush_timer = None
+        self._timer_lock = threading.Lock()
+
+        # Pool of read-only connections - WAL lets readers run alongside the writer
+        self._readers = queue.Queue()
+        for _ in range(self.READER_POOL_SIZE):
+            self._readers.put(sqlite3.connect(
+                f"file:{db_path}?mode=ro", uri=True, check_same_thread=False,
+                cached_statements=self.STATEMENT_CACHE_SIZE
+            ))
+
+        self._closed = threading.Event()
+        threading.Thread(target=self._checkpoint_loop, daemon=True).start()
+
+    def _checkpoint_loop(self):
+        """Periodically copy WAL pages back into the database without blocking writers"""
+        while not self._closed.wait(self.CHECKPOINT_INTERVAL):
+            try:
+                with self._wlock:
+                    self._writer.execute('PRAGMA wal_checkpoint(PASSIVE)')
+            except sqlite3.Error:
+                # Busy or closing - try again on the next tick
+                continue
+
+    @contextmanager
+    def _reader(self):
+        """Borrow a read-only connection from the pool"""
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
     def init_db(self):
         """Create tables if they don't exist"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                birth_date TEXT NOT NULL,
-                birth_time TEXT NOT NULL,
-                birth_location TEXT NOT NULL,
-                latitude REAL,
-                longitude REAL,
-                timezone TEXT,
-                created_at TEXT NOT NULL
-            )
-        ''')
-        
-        # Conversations table with session support
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS conversations (
-                conv_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                session_id TEXT NOT NULL,
-                query TEXT NOT NULL,
-                response TEXT NOT NULL,
-                character_id TEXT,
-                language TEXT,
-                timestamp TEXT NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Sessions table to track active sessions
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sessions (
-                session_id TEXT PRIMARY KEY,
-                user_id INTEGER NOT NULL,
-                character_id TEXT,
-                language TEXT,
-                created_at TEXT NOT NULL,
-                last_active TEXT NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users (user_id)
-            )
+        with self._wlock:
+            # Users table
+            self._writer.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    birth_date TEXT NOT NULL,
+                    birth_time TEXT NOT NULL,
+                    birth_location TEXT NOT NULL,
+                    latitude REAL,
+                    longitude REAL,
+                    timezone TEXT,
+                    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+                )
+            ''')
+
+            # Conversations table with session support
+            self._writer.execute('''
+                CREATE TABLE IF NOT EXISTS conversations (
+                    conv_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    session_id TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    character_id TEXT,
+                    language TEXT,
+                    timestamp TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+                    FOREIGN KEY (user_id) REFERENCES users (user_id)
+                )
+            ''')
+            # History lookups filter by session/user and read newest-first
+            self._writer.execute('''
+                CREATE INDEX IF NOT EXISTS ix_conv_session
+                ON conversations (session_id, conv_id DESC)
+            ''')
+            self._writer.execute('''
+                CREATE INDEX IF NOT EXISTS ix_conv_user
+                ON conversations (user_id, conv_id DESC)
+            ''')
+
+            # Sessions table to track active sessions
+            self._writer.execute('''
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    user_id INTEGER NOT NULL,
+                    character_id TEXT,
+                    language TEXT,
+                    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+                    last_active TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+                    FOREIGN KEY (user_id) REFERENCES users (user_id)
+                )
+            ''')
+
+            # Birth details identify a user - lets find_or_create_user upsert in one statement.
+            # Check, merge and create share one write transaction, so workers initialising
+            # the same fresh file at once can't both build the index
+            self._writer.execute('BEGIN IMMEDIATE')
+            try:
+                has_ident_index = self._writer.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ux_users_ident'"
+                ).fetchone()
+                if not has_ident_index:
+                    self._merge_duplicate_users()
+                    self._writer.execute('''
+                        CREATE UNIQUE INDEX IF NOT EXISTS ux_users_ident
+                        ON users (name, birth_date, birth_time, birth_location)
+                    ''')
+                self._writer.execute('COMMIT')
+            except Exception:
+                self._writer.execute('ROLLBACK')
+                raise
+
+            # Gather planner statistics once (sqlite_stat1 only exists after ANALYZE)
+            analyzed = self._writer.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone()
+            if not analyzed:
+                self._writer.execute('ANALYZE')
+
+    def _merge_duplicate_users(self):
+        """
+        Collapse users sharing the same birth details onto the lowest user_id
+
+        Databases written before ux_users_ident existed can hold such duplicates
+        (find_or_create_user used to SELECT then INSERT), and they would make the
+        CREATE UNIQUE INDEX fail. Called with _wlock held, inside init_db's transaction.
+        """
+        self._writer.execute('''
+            CREATE TEMP TABLE user_remap AS
+            SELECT u.user_id AS old_id, k.keep_id
+            FROM users u
+            JOIN (
+                SELECT name, birth_date, birth_time, birth_location, MIN(user_id) AS keep_id
+                FROM users
+                GROUP BY name, birth_date, birth_time, birth_location
+                HAVING COUNT(*) > 1
+            ) k USING (name, birth_date, birth_time, birth_location)
+            WHERE u.user_id <> k.keep_id
         ''')
-        
-        conn.commit()
-        conn.close()
-    
-    def find_or_create_user(self, name, birth_date, birth_time, birth_location, 
+        for table in ('conversations', 'sessions'):
+            self._writer.execute(f'''
+                UPDATE {table}
+                SET user_id = (SELECT keep_id FROM user_remap WHERE old_id = {table}.user_id)
+                WHERE user_id IN (SELECT old_id FROM user_remap)
+            ''')
+        self._writer.execute('DELETE FROM users WHERE user_id IN (SELECT old_id FROM user_remap)')
+        self._writer.execute('DROP TABLE user_remap')
+
+    def find_or_create_user(self, name, birth_date, birth_time, birth_location,
                            latitude=None, longitude=None, timezone=None):
         """Find existing user or create new one based on birth details"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        # Try to find existing user with same birth details
-        cursor.execute('''
-            SELECT user_id FROM users 
-            WHERE name = ? AND birth_date = ? AND birth_time = ? AND birth_location = ?
-        ''', (name, birth_date, birth_time, birth_location))
-        
-        user = cursor.fetchone()
-        
-        if user:
-            user_id = user[0]
-        else:
-            # Create new user
-            cursor.execute('''
-                INSERT INTO users (name, birth_date, birth_time, birth_location, 
+        with self._wlock:
+            # Insert new user, or hit the existing row with the same birth details.
+            # The no-op DO UPDATE makes RETURNING yield the id in both cases.
+            # Timestamps are produced by SQLite itself; the column is named explicitly
+            # because databases created before the DEFAULT was added have none.
+            user = self._writer.execute('''
+                INSERT INTO users (name, birth_date, birth_time, birth_location,
                                  latitude, longitude, timezone, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (name, birth_date, birth_time, birth_location, 
-                  latitude, longitude, timezone, datetime.now().isoformat()))
-            user_id = cursor.lastrowid
-        
-        conn.commit()
-        conn.close()
-        return user_id
-    
+                VALUES (?, ?, ?, ?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+                ON CONFLICT(name, birth_date, birth_time, birth_location) DO UPDATE SET
+                    name = excluded.name
+                RETURNING user_id
+            ''', (name, birth_date, birth_time, birth_location,
+                  latitude, longitude, timezone)).fetchone()
+            return user[0]
+
     def create_or_update_session(self, session_id, user_id, character_id, language):
         """Create new session or update existing one"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        now = datetime.now().isoformat()
-        
-        cursor.execute('''
-            INSERT INTO sessions (session_id, user_id, character_id, language, created_at, last_active)
-            VALUES (?, ?, ?, ?, ?, ?)
-            ON CONFLICT(session_id) DO UPDATE SET
-                last_active = ?,
-                character_id = ?,
-                language = ?
-        ''', (session_id, user_id, character_id, language, now, now, now, character_id, language))
-        
-        conn.commit()
-        conn.close()
-    
+        with self._wlock:
+            self._writer.execute('''
+                INSERT INTO sessions (session_id, user_id, character_id, language, created_at, last_active)
+                VALUES (?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'), strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+                ON CONFLICT(session_id) DO UPDATE SET
+                    last_active = excluded.last_active,
+                    character_id = excluded.character_id,
+                    language = excluded.language
+            ''', (session_id, user_id, character_id, language))
+
     def add_conversation(self, user_id, session_id, query, response, character_id, language):
-        """Add a conversation exchange"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO conversations (user_id, session_id, query, response, 
-                                     character_id, language, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (user_id, session_id, query, response, character_id, language, 
-              datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
-    
+        """Add a conversation exchange (buffered, see _flush)"""
+        self._pending.append((user_id, session_id, query, response, character_id, language))
+
+        if len(self._pending) >= self.FLUSH_BATCH_SIZE:
+            self._flush()
+        else:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        """Start the flush timer if one isn't already pending"""
+        with self._timer_lock:
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.FLUSH_INTERVAL, self._flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _flush(self):
+        """Write all buffered conversations in a single transaction"""
+        with self._timer_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+        with self._wlock:
+            # Drained under the writer lock, so a concurrent flush (e.g. a history
+            # read's read-your-writes flush) waits for this COMMIT instead of
+            # finding the deque empty and reading SQLite before the rows land
+            rows = []
+            while self._pending:
+                rows.append(self._pending.popleft())
+            if not rows:
+                return
+
+            self._writer.execute('BEGIN IMMEDIATE')
+            try:
+                self._writer.executemany('''
+                    INSERT INTO conversations (user_id, session_id, query, response,
+                                             character_id, language, timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+                ''', rows)
+                self._writer.execute('COMMIT')
+            except Exception:
+                self._writer.execute('ROLLBACK')
+                # Keep the rows so the next flush retries them
+                self._pending.extendleft(reversed(rows))
+                raise
+
     def get_session_history(self, session_id, limit=20):
         """Get conversation history for a specific session"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT query, response, timestamp
-            FROM conversations
-            WHERE session_id = ?
-            ORDER BY conv_id DESC
-            LIMIT ?
-        ''', (session_id, limit))
-        
-        conversations = cursor.fetchall()
-        conn.close()
-        
-        # Reverse to get chronological order (oldest to newest)
-        conversations.reverse()
-        
-        # Format as conversation history for LLM
-        history = []
-        for query, response, timestamp in conversations:
-            history.append({"role": "user", "content": query})
-            history.append({"role": "assistant", "content": response})
-        
-        return history
-    
+        self._flush()  # read-your-writes
+        with self._reader() as conn:
+            # Newest N rows, returned oldest to newest
+            cursor = conn.execute('''
+                SELECT query, response FROM (
+                    SELECT query, response, conv_id
+                    FROM conversations
+                    WHERE session_id = ?
+                    ORDER BY conv_id DESC
+                    LIMIT ?
+                ) ORDER BY conv_id ASC
+            ''', (session_id, limit))
+
+            # Format as conversation history for LLM
+            return [
+                message
+                for query, response in cursor
+                for message in ({"role": "user", "content": query},
+                                {"role": "assistant", "content": response})
+            ]
+
     def get_user_history(self, user_id, limit=20):
         """Get all conversation history for a user (across sessions)"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT query, response, timestamp
-            FROM conversations
-            WHERE user_id = ?
-            ORDER BY conv_id DESC
-            LIMIT ?
-        ''', (user_id, limit))
-        
-        conversations = cursor.fetchall()
-        conn.close()
-        
-        # Reverse to get chronological order
-        conversations.reverse()
-        
-        # Format as conversation history
-        history = []
-        for query, response, timestamp in conversations:
-            history.append({"role": "user", "content": query})
-            history.append({"role": "assistant", "content": response})
-        
-        return history
-    
+        self._flush()
+        with self._reader() as conn:
+            # Newest N rows, returned oldest to newest
+            cursor = conn.execute('''
+                SELECT query, response FROM (
+                    SELECT query, response, conv_id
+                    FROM conversations
+                    WHERE user_id = ?
+                    ORDER BY conv_id DESC
+                    LIMIT ?
+                ) ORDER BY conv_id ASC
+            ''', (user_id, limit))
+
+            # Format as conversation history
+            return [
+                message
+                for query, response in cursor
+                for message in ({"role": "user", "content": query},
+                                {"role": "assistant", "content": response})
+            ]
+
     def get_stats(self):
         """Get database statistics"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM users')
-        total_users = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM conversations')
-        total_conversations = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM sessions')
-        total_sessions = cursor.fetchone()[0]
-        
-        conn.close()
-        
+        self._flush()
+        with self._reader() as conn:
+            total_users = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+            total_conversations = conn.execute('SELECT COUNT(*) FROM conversations').fetchone()[0]
+            total_sessions = conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
         return {
             'total_users': total_users,
             'total_conversations': total_conversations,
             'total_sessions': total_sessions
         }
+
+    def close(self):
+        """Close the writer and all pooled reader connections (call on shutdown)"""
+        self._closed.set()
+        self._flush()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+        with self._wlock:
+            self._writer.close()
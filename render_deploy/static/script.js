@@ -192,8 +192,8 @@ async function sendMessage() {
                 console.log('User ID:', sessionData.userId);
             }
             
-            // Split response by ||| and add as separate messages
-            const messages = data.response.split('|||').map(msg => msg.trim()).filter(msg => msg.length > 0);
+            // The server sends the reply already split into separate messages
+            const messages = data.responses;
             
             messages.forEach((msg, index) => {
                 setTimeout(() => {
@@ -4,21 +4,29 @@ Run: python test_api.py [base_url]
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import sys
 
 BASE_URL = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:5000"
 
+# One keep-alive session for all calls (no new TCP/TLS handshake per request)
+SESSION = requests.Session()
+SESSION.headers.update({"Content-Type": "application/json"})
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
 def test_health():
     print("\n=== Health Check ===")
-    r = requests.get(f"{BASE_URL}/health")
+    r = SESSION.get(f"{BASE_URL}/health")
     print(f"Status: {r.status_code}")
     print(json.dumps(r.json(), indent=2))
     return r.status_code == 200
 
 def test_characters():
     print("\n=== Characters ===")
-    r = requests.get(f"{BASE_URL}/api/v1/characters")
+    r = SESSION.get(f"{BASE_URL}/api/v1/characters")
     print(f"Status: {r.status_code}")
     data = r.json()
     if data.get('success'):
@@ -28,7 +36,7 @@ def test_characters():
 
 def test_remedies():
     print("\n=== Saturn Remedies ===")
-    r = requests.get(f"{BASE_URL}/api/v1/remedies/saturn")
+    r = SESSION.get(f"{BASE_URL}/api/v1/remedies/saturn")
     print(f"Status: {r.status_code}")
     data = r.json()
     if data.get('success'):
@@ -67,7 +75,7 @@ def test_chat():
         "conversation_history": []
     }
 
-    r = requests.post(f"{BASE_URL}/api/v1/chat", json=payload)
+    r = SESSION.post(f"{BASE_URL}/api/v1/chat", json=payload)
     print(f"Status: {r.status_code}")
     data = r.json()
 
@@ -110,7 +118,7 @@ def test_chat_followup():
         ]
     }
 
-    r = requests.post(f"{BASE_URL}/api/v1/chat", json=payload)
+    r = SESSION.post(f"{BASE_URL}/api/v1/chat", json=payload)
     print(f"Status: {r.status_code}")
     data = r.json()
 
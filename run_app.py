@@ -17,4 +17,14 @@ logger = setup_logger(__name__)
 if __name__ == '__main__':
     port = int(os.environ.get('PORT_BOT', 5000))
     logger.info(f"Starting ASTRA server on port {port}")
-    app.run(host='0.0.0.0', port=port, debug=False)
+
+    if os.environ.get('FLASK_DEBUG', 'false').lower() in ('1', 'true'):
+        # Werkzeug dev server - single process, local development only
+        logger.warning("Using the Werkzeug dev server; deploy with: gunicorn -c gunicorn_conf.py wsgi:app")
+        app.run(host='0.0.0.0', port=port, debug=True, threaded=True)
+    else:
+        # Production WSGI server - handles requests concurrently on a thread pool
+        from waitress import serve
+        serve(app, host='0.0.0.0', port=port,
+              threads=int(os.environ.get('WAITRESS_THREADS', 8)),
+              ident=None)  # don't advertise the server in a Server: header
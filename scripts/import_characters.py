@@ -6,12 +6,15 @@ Import character data from CSV file into the database.
 Usage:
     python -m scripts.import_characters --csv characters.csv
     python -m scripts.import_characters --csv characters.csv --update  # Update existing characters
+    python -m scripts.import_characters --csv characters.csv --verbose # Log every row, not just the summary
 """
 
 import argparse
 import csv
 import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -22,32 +25,111 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Number of queued rows written per transaction
+IMPORT_BATCH_SIZE = 1000
 
-def validate_csv_row(row, line_number):
-    """Validate a CSV row has required fields"""
+# Letters, digits and underscores, with at least one letter or digit
+_CHARACTER_ID_RE = re.compile(r'\A_*[A-Za-z0-9][A-Za-z0-9_]*\Z')
+
+
+def validate_csv_row(row, line_number, columns):
+    """Validate a CSV row has required fields (columns maps header name -> index)"""
     required_fields = ['character_id', 'name']
-    missing = [field for field in required_fields if not row.get(field)]
+    missing = [field for field in required_fields if not row[columns[field]]]
 
     if missing:
         logger.error(f"Line {line_number}: Missing required fields: {', '.join(missing)}")
         return False
 
     # Validate character_id format (lowercase, no spaces, alphanumeric + underscores)
-    char_id = row['character_id'].strip()
-    if not char_id.replace('_', '').isalnum():
+    char_id = row[columns['character_id']].strip()
+    if not _CHARACTER_ID_RE.match(char_id):
         logger.error(f"Line {line_number}: Invalid character_id '{char_id}'. Use alphanumeric characters and underscores only.")
         return False
 
     return True
 
 
-def import_characters_from_csv(csv_path, update_existing=False):
+def normalize_csv_row(row, line_number, columns):
+    """
+    Validate a CSV row and convert it to a character record
+
+    Args:
+        row: List of values from csv.reader
+        line_number: Line number in the CSV (for error messages)
+        columns: Header name -> column index
+
+    Returns:
+        Tuple of (character_id, name, emoji, about, age, experience, specialty, language_style),
+        or None if the row is invalid
+    """
+    # Short rows behave as if the missing trailing cells were empty
+    if len(row) < len(columns):
+        row = row + [''] * (len(columns) - len(row))
+
+    if not validate_csv_row(row, line_number, columns):
+        return None
+
+    # Extract and clean data (optional columns may be absent from the header)
+    character_id = row[columns['character_id']].strip().lower()
+    name = row[columns['name']].strip()
+    emoji = (row[columns['emoji']].strip() if 'emoji' in columns else '') or '✨'
+    about = (row[columns['about']].strip() if 'about' in columns else '') or None
+    specialty = (row[columns['specialty']].strip() if 'specialty' in columns else '') or None
+    language_style = row[columns['language_style']].strip().lower() if 'language_style' in columns else 'casual'
+    age = row[columns['age']].strip() if 'age' in columns else ''
+    experience = row[columns['experience']].strip() if 'experience' in columns else ''
+
+    # Parse integers
+    try:
+        age = int(age) if age else None
+    except ValueError:
+        logger.warning(f"Line {line_number}: Invalid age value, skipping age")
+        age = None
+
+    try:
+        experience = int(experience) if experience else None
+    except ValueError:
+        logger.warning(f"Line {line_number}: Invalid experience value, skipping experience")
+        experience = None
+
+    return (character_id, name, emoji, about, age, experience, specialty, language_style)
+
+
+def _write_batch(db, inserts, updates, verbose=False):
+    """
+    Write one batch of character rows in a single transaction
+
+    Returns:
+        Tuple of (added_count, updated_count, error_count)
+    """
+    if not inserts and not updates:
+        return (0, 0, 0)
+
+    inserted, updated = db.bulk_save_characters(inserts, updates)
+
+    if inserted != len(inserts):
+        logger.error(f"✗ Failed to add {len(inserts) - inserted} of {len(inserts)} character(s)")
+    elif verbose:
+        for record in inserts:
+            logger.info(f"✓ Added: {record[0]} - {record[1]}")
+    if updated != len(updates):
+        logger.error(f"✗ Failed to update {len(updates) - updated} of {len(updates)} character(s)")
+    elif verbose:
+        for record in updates:
+            logger.info(f"✓ Updated: {record[0]} - {record[1]}")
+
+    return (inserted, updated, (len(inserts) - inserted) + (len(updates) - updated))
+
+
+def import_characters_from_csv(csv_path, update_existing=False, verbose=False):
     """
     Import characters from CSV file into database
 
     Args:
         csv_path: Path to CSV file
         update_existing: If True, update existing characters. If False, skip them.
+        verbose: If True, log every added/updated/skipped row (otherwise only a summary)
 
     Returns:
         Tuple of (success_count, skip_count, error_count)
@@ -58,108 +140,86 @@ def import_characters_from_csv(csv_path, update_existing=False):
 
     db = get_db_instance()
 
-    success_count = 0
     skip_count = 0
     error_count = 0
+    batch_results = []  # (added, updated, errors) per written batch
+
+    # Rows are bucketed here and written in bulk, IMPORT_BATCH_SIZE rows per transaction
+    inserts = []
+    updates = []
+
+    # Single writer thread: DB writes overlap with parsing/validation of the next batch
+    writer = ThreadPoolExecutor(max_workers=1)
+    pending_write = None
 
     try:
         with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
+            reader = csv.reader(f)
+            header = next(reader, [])
+            columns = {name: i for i, name in enumerate(header)}
 
             # Validate CSV has required columns
             required_columns = ['character_id', 'name']
-            if not all(col in reader.fieldnames for col in required_columns):
+            if not all(col in columns for col in required_columns):
                 logger.error(f"CSV must have columns: {', '.join(required_columns)}")
-                logger.error(f"Found columns: {', '.join(reader.fieldnames)}")
+                logger.error(f"Found columns: {', '.join(header)}")
                 return (0, 0, 1)
 
-            logger.info(f"Importing characters from: {csv_path}")
-            logger.info(f"Update mode: {update_existing}")
-            logger.info("-" * 60)
+            logger.debug(f"Importing characters from: {csv_path}")
+            logger.debug(f"Update mode: {update_existing}")
+
+            # Load existing IDs once instead of one lookup per row
+            existing_ids = db.get_all_character_ids()
 
             for line_num, row in enumerate(reader, start=2):  # Start at 2 (header is line 1)
-                # Validate row
-                if not validate_csv_row(row, line_num):
+                if not row:  # blank line (DictReader skipped these too)
+                    continue
+
+                record = normalize_csv_row(row, line_num, columns)
+                if record is None:
                     error_count += 1
                     continue
+                character_id, name = record[0], record[1]
 
-                # Extract and clean data
-                character_id = row['character_id'].strip().lower()
-                name = row['name'].strip()
-                emoji = row.get('emoji', '✨').strip() or '✨'
-                about = row.get('about', '').strip() or None
-                specialty = row.get('specialty', '').strip() or None
-                language_style = row.get('language_style', 'casual').strip().lower()
-
-                # Parse integers
-                try:
-                    age = int(row['age']) if row.get('age', '').strip() else None
-                except ValueError:
-                    logger.warning(f"Line {line_num}: Invalid age value, skipping age")
-                    age = None
-
-                try:
-                    experience = int(row['experience']) if row.get('experience', '').strip() else None
-                except ValueError:
-                    logger.warning(f"Line {line_num}: Invalid experience value, skipping experience")
-                    experience = None
-
-                # Check if character exists
-                existing = db.get_character(character_id)
-
-                if existing:
+                # Check if character exists (or is already queued from an earlier line)
+                if character_id in existing_ids:
                     if update_existing:
-                        # Update existing character
-                        updated = db.update_character(
-                            character_id,
-                            name=name,
-                            emoji=emoji,
-                            about=about,
-                            age=age,
-                            experience=experience,
-                            specialty=specialty,
-                            language_style=language_style
-                        )
-                        if updated:
-                            logger.info(f"✓ Updated: {character_id} - {name}")
-                            success_count += 1
-                        else:
-                            logger.error(f"✗ Failed to update: {character_id}")
-                            error_count += 1
+                        updates.append(record)
                     else:
-                        logger.info(f"⊘ Skipped (exists): {character_id} - {name}")
+                        if verbose:
+                            logger.info(f"⊘ Skipped (exists): {character_id} - {name}")
                         skip_count += 1
                 else:
-                    # Add new character
-                    added = db.add_character(
-                        character_id=character_id,
-                        name=name,
-                        emoji=emoji,
-                        about=about,
-                        age=age,
-                        experience=experience,
-                        specialty=specialty,
-                        language_style=language_style
-                    )
-                    if added:
-                        logger.info(f"✓ Added: {character_id} - {name}")
-                        success_count += 1
-                    else:
-                        logger.error(f"✗ Failed to add: {character_id}")
-                        error_count += 1
+                    inserts.append(record)
+                    existing_ids.add(character_id)
+
+                if len(inserts) + len(updates) >= IMPORT_BATCH_SIZE:
+                    # Hand the batch to the writer and keep parsing the next one.
+                    # Waiting on the previous batch keeps at most two batches in memory.
+                    if pending_write:
+                        batch_results.append(pending_write.result())
+                    pending_write = writer.submit(_write_batch, db, inserts, updates, verbose)
+                    inserts, updates = [], []
+
+            if pending_write:
+                batch_results.append(pending_write.result())
+            batch_results.append(_write_batch(db, inserts, updates, verbose))
 
     except Exception as e:
         logger.error(f"Error reading CSV: {e}")
-        return (success_count, skip_count, error_count + 1)
+        added, updated, failed = (sum(counts) for counts in zip((0, 0, 0), *batch_results))
+        return (added + updated, skip_count, error_count + failed + 1)
+    finally:
+        writer.shutdown(wait=True)
+
+    added, updated, failed = (sum(counts) for counts in zip((0, 0, 0), *batch_results))
+    success_count = added + updated
+    error_count += failed
 
     # Clear character cache so new characters are loaded
     clear_character_cache()
 
-    logger.info("-" * 60)
-    logger.info(f"Import complete:")
-    logger.info(f"  ✓ Success: {success_count}")
-    logger.info(f"  ⊘ Skipped: {skip_count}")
-    logger.info(f"  ✗ Errors:  {error_count}")
+    logger.info(f"Import complete: Added {added}, Updated {updated}, Skipped {skip_count}, Errors {error_count}")
 
     return (success_count, skip_count, error_count)
 
@@ -168,10 +228,11 @@ def main():
     parser = argparse.ArgumentParser(description='Import characters from CSV into database')
     parser.add_argument('--csv', required=True, help='Path to CSV file')
     parser.add_argument('--update', action='store_true', help='Update existing characters')
+    parser.add_argument('--verbose', action='store_true', help='Log every imported row')
 
     args = parser.parse_args()
 
-    success, skipped, errors = import_characters_from_csv(args.csv, args.update)
+    success, skipped, errors = import_characters_from_csv(args.csv, args.update, args.verbose)
 
     # Exit with error code if there were errors
     if errors > 0:
@@ -28,10 +28,21 @@ logger = setup_logger(__name__)
 # Database path
 DB_PATH = os.path.join(os.getcwd(), 'astra.db')
 
+# Shared UserDatabase, created on first use (init_db runs once per process)
+_DB = None
+
+
+def _db():
+    """Get the process-wide UserDatabase instance"""
+    global _DB
+    if _DB is None:
+        _DB = UserDatabase(DB_PATH)
+    return _DB
+
 
 def list_characters(show_all=False):
     """List all characters in database"""
-    db = UserDatabase(DB_PATH)
+    db = _db()
     characters = db.get_all_characters(active_only=not show_all)
 
     if not characters:
@@ -58,7 +69,7 @@ def list_characters(show_all=False):
 
 def activate_character(character_id):
     """Activate a character"""
-    db = UserDatabase(DB_PATH)
+    db = _db()
 
     if db.activate_character(character_id):
         logger.info(f"✓ Activated character: {character_id}")
@@ -71,7 +82,7 @@ def activate_character(character_id):
 
 def deactivate_character(character_id):
     """Deactivate a character"""
-    db = UserDatabase(DB_PATH)
+    db = _db()
 
     if db.deactivate_character(character_id):
         logger.info(f"✓ Deactivated character: {character_id}")
@@ -84,7 +95,7 @@ def deactivate_character(character_id):
 
 def export_characters(output_path):
     """Export all characters to CSV"""
-    db = UserDatabase(DB_PATH)
+    db = _db()
     characters = db.get_all_characters(active_only=False)
 
     if not characters:
@@ -94,20 +105,22 @@ def export_characters(output_path):
     try:
         with open(output_path, 'w', newline='', encoding='utf-8') as f:
             fieldnames = ['character_id', 'name', 'emoji', 'about', 'age', 'experience', 'specialty', 'language_style']
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-
-            writer.writeheader()
-            for char in characters:
-                writer.writerow({
-                    'character_id': char['character_id'],
-                    'name': char['name'],
-                    'emoji': char.get('emoji', '✨'),
-                    'about': char.get('about', ''),
-                    'age': char.get('age', ''),
-                    'experience': char.get('experience', ''),
-                    'specialty': char.get('specialty', ''),
-                    'language_style': char.get('language_style', 'casual')
-                })
+            writer = csv.writer(f)
+
+            writer.writerow(fieldnames)
+            writer.writerows(
+                (
+                    char['character_id'],
+                    char['name'],
+                    char.get('emoji', '✨'),
+                    char.get('about', ''),
+                    char.get('age', ''),
+                    char.get('experience', ''),
+                    char.get('specialty', ''),
+                    char.get('language_style', 'casual')
+                )
+                for char in characters
+            )
 
         logger.info(f"✓ Exported {len(characters)} characters to: {output_path}")
         return True
@@ -6,64 +6,103 @@ Run this AFTER initializing PostgreSQL schema
 from src.utils import config
 from src.database.database import UserDatabase  # SQLite
 from src.database.pg_database import PostgreSQLDatabase  # PostgreSQL
-import json
+import queue
+import threading
 from datetime import datetime
+from itertools import groupby, islice
+from operator import itemgetter
 
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+USER_BATCH_SIZE = 500
+CONVERSATION_BATCH_SIZE = 1000
+PIPELINE_DEPTH = 4  # batches read ahead of the PostgreSQL writer
+RULE = "=" * 60
 
+_DONE = object()
 
-def migrate_users(sqlite_db, pg_db):
-    """Migrate all users from SQLite to PostgreSQL"""
 
-    logger.info("\n[DATA] Migrating users...")
+def _batched(iterable, size):
+    """Split an iterable into lists of at most size items"""
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
 
-    users = sqlite_db.list_users()
 
-    if not users:
-        logger.info("  [INFO]  No users found in SQLite database")
-        return {}
+def _read_ahead(batches, depth=PIPELINE_DEPTH):
+    """
+    Yield batches produced by a background thread
 
-    user_id_mapping = {}  # Old ID -> New ID
+    SQLite reads for the next batches overlap with the PostgreSQL write of the
+    current one; the bounded queue keeps the reader at most `depth` batches ahead.
+    """
+    pending = queue.Queue(maxsize=depth)
 
-    for old_user in users:
-        user_id = old_user[0]
+    def reader():
+        try:
+            for batch in batches:
+                pending.put(batch)
+            pending.put(_DONE)
+        except Exception as e:
+            pending.put(e)
 
-        # Get full user data
-        full_user = sqlite_db.get_user(user_id)
+    threading.Thread(target=reader, daemon=True).start()
 
-        if not full_user:
-            continue
+    while True:
+        item = pending.get()
+        if item is _DONE:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
 
-        # Extract user data
-        (_, name, birth_date, birth_time, birth_location,
-         latitude, longitude, timezone, natal_chart_json, created_at) = full_user
 
-        # Parse natal chart
-        natal_chart = json.loads(natal_chart_json) if natal_chart_json else {}
+def migrate_users(sqlite_db, pg_db):
+    """Migrate all users from SQLite to PostgreSQL"""
 
-        try:
-            # Add to PostgreSQL
-            new_user_id = pg_db.add_user(
-                name=name,
-                birth_date=birth_date,  # Already in DD/MM/YYYY format
-                birth_time=birth_time,
-                birth_location=birth_location,
-                latitude=latitude,
-                longitude=longitude,
-                timezone=timezone,
-                natal_chart=natal_chart
+    logger.info("\n[DATA] Migrating users...")
+
+    def read_users():
+        # One SELECT streams every full user row
+        for full_user in sqlite_db.iter_all_users_full():
+            # Extract user data
+            (user_id, name, birth_date, birth_time, birth_location,
+             latitude, longitude, timezone, natal_chart_json, created_at) = full_user
+
+            yield user_id, (
+                name,
+                birth_date,  # Already in DD/MM/YYYY format
+                birth_time,
+                birth_location,
+                latitude,
+                longitude,
+                timezone,
+                natal_chart_json or '{}'  # JSON text, passed through unparsed
             )
 
-            user_id_mapping[user_id] = new_user_id
-            logger.info("  [OK] Migrated user: {name} (ID: {user_id} -> {new_user_id})")
+    user_id_mapping = {}  # Old ID -> New ID
 
-        except Exception as e:
-            logger.info("  [ERROR] Failed to migrate user {name}: {e}")
+    try:
+        for batch in _read_ahead(_batched(read_users(), USER_BATCH_SIZE)):
+            old_ids, rows = zip(*batch)
+            # Add to PostgreSQL in multi-row batches
+            new_user_ids = pg_db.bulk_add_users(list(rows))
+            user_id_mapping.update(zip(old_ids, new_user_ids))
+
+    except Exception as e:
+        logger.info("  [ERROR] Failed to migrate users: %s", e)
+        raise
+
+    if not user_id_mapping:
+        logger.info("  [INFO]  No users found in SQLite database")
+        return {}
 
-    logger.info("\n[OK] Migrated {len(user_id_mapping)} users")
+    logger.info("\n[OK] Migrated %d users", len(user_id_mapping))
     return user_id_mapping
 
 
@@ -72,43 +111,30 @@ def migrate_conversations(sqlite_db, pg_db, user_id_mapping):
 
     logger.info("\n[CONV] Migrating conversations...")
 
-    total_conversations = 0
-
-    for old_user_id, new_user_id in user_id_mapping.items():
-        # Get conversation history for this user
-        history = sqlite_db.get_conversation_history(old_user_id, limit=1000)
+    date_str = datetime.now().strftime('%Y%m%d')  # same for every session in this run
 
-        if not history:
-            continue
+    def read_conversations():
+        # One ordered scan of all conversations instead of a query per user;
+        # SQLite already stores each exchange as a query/response pair
+        for old_user_id, rows in groupby(sqlite_db.iter_all_conversation_history(), key=itemgetter(0)):
+            new_user_id = user_id_mapping.get(old_user_id)
+            if new_user_id is None:
+                continue
 
-        # Group messages into user/assistant pairs
-        # history format: [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}]
+            session_id = f"migrated_session_{new_user_id}_{date_str}"
 
-        session_id = f"migrated_session_{new_user_id}_{datetime.now().strftime('%Y%m%d')}"
+            for _, query, response in rows:
+                yield (new_user_id, query, response, session_id)
 
-        # Extract query/response pairs
-        i = 0
-        while i < len(history) - 1:
-            if history[i]["role"] == "user" and history[i + 1]["role"] == "assistant":
-                query = history[i]["content"]
-                response = history[i + 1]["content"]
-
-                try:
-                    pg_db.add_conversation(
-                        user_id=new_user_id,
-                        query=query,
-                        response=response,
-                        session_id=session_id
-                    )
-                    total_conversations += 1
-                except Exception as e:
-                    logger.info("  [ERROR] Failed to migrate conversation: {e}")
-
-                i += 2
-            else:
-                i += 1
+    total_conversations = 0
+    try:
+        for batch in _read_ahead(_batched(read_conversations(), CONVERSATION_BATCH_SIZE)):
+            total_conversations += pg_db.bulk_add_conversations(batch)
+    except Exception as e:
+        logger.info("  [ERROR] Failed to migrate conversations: %s", e)
+        raise
 
-    logger.info("Migrated {total_conversations} conversations")
+    logger.info("Migrated %d conversations", total_conversations)
 
 
 def verify_migration(sqlite_db, pg_db, user_id_mapping):
@@ -117,10 +143,10 @@ def verify_migration(sqlite_db, pg_db, user_id_mapping):
     logger.info("\n[CHECK] Verifying migration...")
 
     # Check user count
-    sqlite_users = len(sqlite_db.list_users())
-    postgres_users = len(pg_db.list_users())
+    sqlite_users = sqlite_db.count_users()
+    postgres_users = pg_db.count_users()
 
-    logger.info("  Users: SQLite={sqlite_users}, PostgreSQL={postgres_users}")
+    logger.info("  Users: SQLite=%d, PostgreSQL=%d", sqlite_users, postgres_users)
 
     if sqlite_users == postgres_users:
         logger.info("  [OK] User count matches")
@@ -129,14 +155,13 @@ def verify_migration(sqlite_db, pg_db, user_id_mapping):
 
     # Check a sample user
     if user_id_mapping:
-        old_id = list(user_id_mapping.keys())[0]
-        new_id = user_id_mapping[old_id]
+        old_id, new_id = next(iter(user_id_mapping.items()))
 
         sqlite_user = sqlite_db.get_user(old_id)
         pg_user = pg_db.get_user(new_id)
 
         if sqlite_user and pg_user:
-            logger.info("  [OK] Sample user verified: {sqlite_user[1]} (ID: {old_id} -> {new_id})")
+            logger.info("  [OK] Sample user verified: %s (ID: %s -> %s)", sqlite_user[1], old_id, new_id)
         else:
             logger.info("  [ERROR] Sample user verification failed")
 
@@ -146,9 +171,9 @@ def verify_migration(sqlite_db, pg_db, user_id_mapping):
 def main():
     """Main migration function"""
 
-    print("=" * 60)
+    print(RULE)
     logger.info("ASTRA Database Migration: SQLite -> PostgreSQL")
-    print("=" * 60)
+    print(RULE)
 
     # Check environment
     if not config.DATABASE_URL:
@@ -165,13 +190,14 @@ def main():
 
     try:
         sqlite_db = UserDatabase(config.DB_NAME)
-        logger.info("  [OK] Connected to SQLite: {config.DB_NAME}")
+        logger.info("  [OK] Connected to SQLite: %s", config.DB_NAME)
 
-        pg_db = PostgreSQLDatabase(config.DATABASE_URL)
+        # Single session: the whole migration runs in one transaction on it
+        pg_db = PostgreSQLDatabase(config.DATABASE_URL, max_conn=1)
         logger.info("  [OK] Connected to PostgreSQL")
 
     except Exception as e:
-        logger.info("  [ERROR] Connection failed: {e}")
+        logger.info("  [ERROR] Connection failed: %s", e)
         return
 
     # Confirm migration
@@ -185,6 +211,12 @@ def main():
 
     # Perform migration
     try:
+        # Everything is written in one PostgreSQL transaction: a single commit,
+        # and a failure leaves PostgreSQL untouched as well.
+        # SQLite stays the source of truth, so a crash before COMMIT is
+        # survivable and the WAL flush wait can be skipped.
+        pg_db.begin(synchronous_commit=False)
+
         # Migrate users
         user_id_mapping = migrate_users(sqlite_db, pg_db)
 
@@ -192,23 +224,26 @@ def main():
         if user_id_mapping:
             migrate_conversations(sqlite_db, pg_db, user_id_mapping)
 
+        pg_db.commit()
+
         # Verify migration
         verify_migration(sqlite_db, pg_db, user_id_mapping)
 
-        print("\n" + "=" * 60)
+        print("\n" + RULE)
         logger.info("MIGRATION COMPLETE!")
-        print("=" * 60)
+        print(RULE)
         logger.info("\nNext steps:")
         logger.info("1. Update .env: Set USE_POSTGRESQL=true")
         logger.info("2. Restart your application")
         logger.info("3. Test with a sample query")
-        logger.info("4. Keep {config.DB_NAME} as backup (don't delete it yet)")
+        logger.info("4. Keep %s as backup (don't delete it yet)", config.DB_NAME)
 
         pg_db.close()
 
     except Exception as e:
-        logger.info("\n[ERROR] Migration failed: {e}")
-        logger.info("\nYour SQLite database is unchanged. Safe to retry.")
+        pg_db.rollback()
+        logger.info("\n[ERROR] Migration failed: %s", e)
+        logger.info("\nNothing was committed to PostgreSQL and your SQLite database is unchanged. Safe to retry.")
 
 
 if __name__ == "__main__":
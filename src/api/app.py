@@ -1,13 +1,29 @@
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, request, stream_with_context
 from flask_cors import CORS
+from flask_compress import Compress
+from collections import OrderedDict
 from src.core.astro_engine import AstroEngine
 from src.core.llm_bridge import EnhancedLLMBridge  # With caching!
+from src.api.json_provider import ORJSONProvider
+from src.api.schemas import (
+    chat_request_json, chat_request_msgpack, history_message_json, history_message_msgpack
+)
 from src.utils import config
+from src.utils.characters import get_all_characters
+import functools
+import gzip
+import hashlib
+import hmac
+import msgspec
+import orjson
 import os
+import re
+import threading
+import time
 
 from src.utils.location import get_coordinates
 from src.utils.logger import setup_logger
-from src.utils.utils import sanitize_role
+from src.utils.utils import ROLE_MAP, split_reply
 
 logger = setup_logger(__name__)
 
@@ -17,534 +33,170 @@ Main endpoint: /api/v1/chat (receives birth data in request)
 """
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+# Brotli (gzip for clients without it) for JSON/HTML bodies over 500 bytes; pre-gzipped responses are left alone
+app.config.update(
+    COMPRESS_ALGORITHM=['br', 'gzip'], COMPRESS_BR_LEVEL=4, COMPRESS_LEVEL=6,
+    COMPRESS_MIN_SIZE=500
+)
+Compress(app)
 CORS(app)
 
-# Initialize components (no database)
-astro = AstroEngine()
-llm = EnhancedLLMBridge()  # Enhanced with caching, no DB
-
-# Interactive frontend HTML template
-HOME_HTML = '''
-<!DOCTYPE html>
-<html>
-<head>
-    <title>ASTRA - AI Vedic Astrology</title>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-        }
-        .header {
-            text-align: center;
-            color: white;
-            margin-bottom: 30px;
-        }
-        .header h1 { font-size: 3em; margin-bottom: 10px; }
-        .header p { font-size: 1.2em; opacity: 0.9; }
-        
-        .tabs {
-            display: flex;
-            gap: 10px;
-            margin-bottom: 20px;
-        }
-        .tab {
-            flex: 1;
-            padding: 15px;
-            background: rgba(255,255,255,0.2);
-            border: none;
-            color: white;
-            font-size: 16px;
-            cursor: pointer;
-            border-radius: 10px;
-            transition: all 0.3s;
-        }
-        .tab:hover { background: rgba(255,255,255,0.3); }
-        .tab.active { background: white; color: #764ba2; font-weight: bold; }
-        
-        .panel {
-            display: none;
-            background: white;
-            padding: 30px;
-            border-radius: 15px;
-            box-shadow: 0 8px 32px rgba(0,0,0,0.2);
-        }
-        .panel.active { display: block; }
-        
-        .form-group {
-            margin-bottom: 20px;
-        }
-        .form-group label {
-            display: block;
-            margin-bottom: 8px;
-            font-weight: bold;
-            color: #333;
-        }
-        .form-group input {
-            width: 100%;
-            padding: 12px;
-            border: 2px solid #ddd;
-            border-radius: 8px;
-            font-size: 16px;
-        }
-        .form-group input:focus {
-            outline: none;
-            border-color: #667eea;
-        }
-        
-        .btn {
-            padding: 12px 30px;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border: none;
-            border-radius: 8px;
-            font-size: 16px;
-            cursor: pointer;
-            transition: transform 0.2s;
-        }
-        .btn:hover { transform: translateY(-2px); }
-        .btn:disabled {
-            opacity: 0.5;
-            cursor: not-allowed;
-        }
-        
-        .users-list {
-            display: grid;
-            gap: 15px;
-            margin-bottom: 20px;
-        }
-        .user-card {
-            padding: 15px;
-            background: #f8f9fa;
-            border-radius: 8px;
-            border-left: 4px solid #667eea;
-            cursor: pointer;
-            transition: all 0.3s;
-        }
-        .user-card:hover { background: #e9ecef; transform: translateX(5px); }
-        .user-card.selected { background: #667eea; color: white; }
-        
-        .chat-container {
-            height: 500px;
-            display: flex;
-            flex-direction: column;
-        }
-        .chat-messages {
-            flex: 1;
-            overflow-y: auto;
-            padding: 20px;
-            background: #f8f9fa;
-            border-radius: 8px;
-            margin-bottom: 15px;
-        }
-        .message {
-            margin-bottom: 15px;
-            padding: 12px 16px;
-            border-radius: 12px;
-            max-width: 80%;
-        }
-        .message.user {
-            background: #667eea;
-            color: white;
-            margin-left: auto;
-        }
-        .message.assistant {
-            background: white;
-            color: #333;
-            border: 1px solid #ddd;
-        }
-        .chat-input-group {
-            display: flex;
-            gap: 10px;
-        }
-        .chat-input-group input {
-            flex: 1;
-            padding: 12px;
-            border: 2px solid #ddd;
-            border-radius: 8px;
-            font-size: 16px;
-        }
-        
-        .alert {
-            padding: 15px;
-            margin-bottom: 20px;
-            border-radius: 8px;
-            font-weight: 500;
-        }
-        .alert.success { background: #d4edda; color: #155724; border: 1px solid #c3e6cb; }
-        .alert.error { background: #f8d7da; color: #721c24; border: 1px solid #f5c6cb; }
-        .alert.info { background: #d1ecf1; color: #0c5460; border: 1px solid #bee5eb; }
-        
-        .loading {
-            display: inline-block;
-            width: 20px;
-            height: 20px;
-            border: 3px solid rgba(255,255,255,.3);
-            border-radius: 50%;
-            border-top-color: white;
-            animation: spin 1s ease-in-out infinite;
-        }
-        @keyframes spin {
-            to { transform: rotate(360deg); }
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>ASTRA</h1>
-            <p>Your AI-Powered Vedic Astrology Companion</p>
-        </div>
-        
-        <div class="tabs">
-            <button class="tab active" onclick="showTab('create')">Create Birth Chart</button>
-            <button class="tab" onclick="showTab('users')">My Charts</button>
-            <button class="tab" onclick="showTab('chat')">Chat with Astra</button>
-        </div>
-        
-        <!-- Create User Panel -->
-        <div id="create-panel" class="panel active">
-            <h2 style="margin-bottom: 20px; color: #764ba2;">Create New Birth Chart</h2>
-            <div id="create-alert"></div>
-            <form id="create-form">
-                <div class="form-group">
-                    <label>Your Name</label>
-                    <input type="text" id="name" placeholder="Enter your name" required>
-                </div>
-                <div class="form-group">
-                    <label>Birth Date (DD/MM/YYYY)</label>
-                    <input type="text" id="birth_date" placeholder="15/08/1990" required>
-                </div>
-                <div class="form-group">
-                    <label>Birth Time (HH:MM in 24-hour format)</label>
-                    <input type="text" id="birth_time" placeholder="14:30" required>
-                </div>
-                <div class="form-group">
-                    <label>Birth Location</label>
-                    <input type="text" id="location" placeholder="Mumbai, India" required>
-                </div>
-                <div class="form-group">
-                    <label>Timezone (e.g. Asia/Kolkata)</label>
-                    <input type="text" id="timezone" placeholder="Asia/Kolkata" value="Asia/Kolkata">
-                </div>
-                <button type="button" class="btn" id="create-btn">Set Birth Chart</button>
-            </form>
-        </div>
-        
-        <!-- Users List Panel -->
-        <div id="users-panel" class="panel">
-            <h2 style="margin-bottom: 20px; color: #764ba2;">Your Birth Charts</h2>
-            <div id="users-alert"></div>
-            <div id="users-list" class="users-list"></div>
-        </div>
-        
-        <!-- Chat Panel -->
-        <div id="chat-panel" class="panel">
-            <h2 style="margin-bottom: 20px; color: #764ba2;">Chat with Astra</h2>
-            <div id="chat-alert"></div>
-
-            <!-- Character Selector -->
-            <div style="margin-bottom: 15px;">
-                <label style="font-weight: 500; margin-bottom: 8px; display: block; color: #555;">Choose Your Guide:</label>
-                <div id="character-selector" style="display: flex; gap: 10px; flex-wrap: wrap;"></div>
-            </div>
-
-            <div class="chat-container">
-                <div class="chat-messages" id="chat-messages">
-                <div class="alert info">Set your birth chart in "Set Birth Chart" first, then start chatting!</div>
-          </div>
-                <div class="chat-input-group">
-                    <input type="text" id="chat-input" placeholder="Ask Astra anything..." disabled>
-                    <button class="btn" id="chat-btn" onclick="sendMessage()" disabled>Send</button>
-                </div>
-            </div>
-        </div>
-    </div>
-    
-    <script>
-         let currentBirthData = null;   // { name, birth_date, birth_time, birth_location, timezone } - no database
-        let currentSessionId = null;
-        let selectedCharacter = 'general';
-        let availableCharacters = {};
-        let conversationHistory = [];  // for /api/v1/chat context
-
-        // Generate unique session ID
-        function generateSessionId() {
-            return 'session_' + Date.now() + '_' + Math.random().toString(36).substr(2, 9);
-        }
-
-        // Load available characters
-        async function loadCharacters() {
-            try {
-                console.log('Loading characters...');
-                const response = await fetch('/api/characters');
-                const result = await response.json();
-                console.log('Characters API response:', result);
-
-                if (result.success) {
-                    availableCharacters = result.characters;
-                    console.log('Available characters:', Object.keys(availableCharacters));
-                    renderCharacterSelector();
-                } else {
-                    console.error('Characters API failed:', result.error);
-                    document.getElementById('character-selector').innerHTML = '<span style="color: red;">Failed to load characters</span>';
-                }
-            } catch (error) {
-                console.error('Failed to load characters:', error);
-                document.getElementById('character-selector').innerHTML = '<span style="color: red;">Error loading characters: ' + error.message + '</span>';
-            }
-        }
-
-        // Render character selector buttons
-        function renderCharacterSelector() {
-            const selector = document.getElementById('character-selector');
-            selector.innerHTML = '';
-
-            Object.keys(availableCharacters).forEach(charId => {
-                const char = availableCharacters[charId];
-                const btn = document.createElement('button');
-                btn.className = 'btn' + (charId === selectedCharacter ? ' active' : '');
-                btn.innerHTML = char.description;
-                btn.title = char.name;
-                btn.style.cssText = 'padding: 8px 16px; font-size: 14px; flex: 0 1 auto;' +
-                                    (charId === selectedCharacter ? ' background: #667eea; color: white;' : ' background: white; color: #667eea; border: 2px solid #667eea;');
-                btn.onclick = () => selectCharacter(charId);
-                selector.appendChild(btn);
-            });
-        }
-
-        // Select character
-        function selectCharacter(charId) {
-            selectedCharacter = charId;
-            renderCharacterSelector();
-            
-            currentSessionId = generateSessionId();
-            conversationHistory = [];
-            const char = availableCharacters[charId];
-            const messages = document.getElementById('chat-messages');
-             if (currentBirthData) {
-                messages.innerHTML = '<div class="alert info" style="font-size: 13px;">Now talking to: <strong>'+char.name+'</strong><br><small>Conversation reset.</small></div>';
-                messages.scrollTop = messages.scrollHeight;
-            }
-        }
-
-        function showTab(tab) {
-            document.querySelectorAll('.tab').forEach(t => t.classList.remove('active'));
-            document.querySelectorAll('.panel').forEach(p => p.classList.remove('active'));
-            
-            const idx = { create: 0, users: 1, chat: 2 }[tab];
-            if (idx !== undefined) document.querySelectorAll('.tab')[idx].classList.add('active');
-            document.getElementById(tab + '-panel').classList.add('active');
-            
-                      if (tab === 'users') renderCurrentChart();
-        }
-        
-               function setBirthChart() {
-            var nameEl = document.getElementById('name');
-            var dateEl = document.getElementById('birth_date');
-            var timeEl = document.getElementById('birth_time');
-            var locationEl = document.getElementById('location');
-            var name = nameEl ? nameEl.value.trim() : '';
-            var birthDate = dateEl ? dateEl.value.trim() : '';
-            var birthTime = timeEl ? timeEl.value.trim() : '';
-            var birthLocation = locationEl ? locationEl.value.trim() : '';
-            if (!name || !birthDate || !birthTime || !birthLocation) {
-                var alertEl = document.getElementById('create-alert');
-                if (alertEl) alertEl.innerHTML = '<div class="alert error">Please fill in Name, Birth Date, Birth Time, and Birth Location.</div>';
-                return;
-            }
-            var tzEl = document.getElementById('timezone');
-            var timezone = (tzEl && tzEl.value && tzEl.value.trim()) ? tzEl.value.trim() : 'Asia/Kolkata';
-            currentBirthData = { name: name, birth_date: birthDate, birth_time: birthTime, birth_location: birthLocation, timezone: timezone };
-            conversationHistory = [];
-            currentSessionId = generateSessionId();
-            var alertEl = document.getElementById('create-alert');
-            if (alertEl) alertEl.innerHTML = '<div class="alert success">✓ Birth chart set! You can start chatting below.</div>';
-            var chatInput = document.getElementById('chat-input');
-            var chatBtn = document.getElementById('chat-btn');
-            if (chatInput) chatInput.disabled = false;
-            if (chatBtn) chatBtn.disabled = false;
-            showTab('chat');
-        }
-        document.getElementById('create-form').addEventListener('submit', function(e) { e.preventDefault(); setBirthChart(); });
-        document.getElementById('create-btn').addEventListener('click', function() { setBirthChart(); });
-        
-        function renderCurrentChart() {
-       
-            const list = document.getElementById('users-list');
-            const alert = document.getElementById('users-alert');
-            
-            alert.innerHTML = '';
-            
-            if (!currentBirthData) {
-                list.innerHTML = '<div class="alert info">Set your birth details in "Set Birth Chart" first.</div>';
-                return;
-            }
-            list.innerHTML = '<div class="user-card" style="pointer-events:none;">' +
-                '<strong>' + currentBirthData.name + '</strong><br>' +
-                '<small>Born: ' + currentBirthData.birth_date + ' ' + currentBirthData.birth_time + ' at ' + currentBirthData.birth_location + ' (' + currentBirthData.timezone + ')</small>' +
-                '</div>';
-        }
-        
-        // Send Chat Message
-        document.getElementById('chat-input').addEventListener('keypress', (e) => {
-            if (e.key === 'Enter') sendMessage();
-        });
-        
-        async function sendMessage() {
-            if (!currentBirthData) {
-                document.getElementById('chat-alert').innerHTML = '<div class="alert error">Please set your birth chart first (Set Birth Chart tab).</div>';
-                return;
-            }
-            const char = availableCharacters[selectedCharacter];
-            if (!char) {
-                document.getElementById('chat-alert').innerHTML = '<div class="alert error">Please wait for characters to load.</div>';
-               return;
-            }
-            
-            const input = document.getElementById('chat-input');
-            const messages = document.getElementById('chat-messages');
-            const btn = document.getElementById('chat-btn');
-            const query = input.value.trim();
-            
-            if (!query) return;
-            
-            // Add user message
-            messages.innerHTML += '<div class="message user">' + query + '</div>';
-            input.value = '';
-            messages.scrollTop = messages.scrollHeight;
-            
-            btn.disabled = true;
-            btn.innerHTML = '<span class="loading"></span>';
-             const characterPayload = {
-                id: char.character_id || selectedCharacter,
-                name: char.name,
-                age: char.age,
-                experience: char.experience,
-                specialty: char.specialty || char.description,
-                language_style: char.language_style || 'casual',
-                about: char.about || ''
-            };
-            const payload = {
-                user_id: 1,
-                query: query,
-                session_id: currentSessionId,
-                character: characterPayload,
-                name: currentBirthData.name,
-                birth_date: currentBirthData.birth_date,
-                birth_time: currentBirthData.birth_time,
-                birth_location: currentBirthData.birth_location,
-                timezone: currentBirthData.timezone,
-                conversation_history: conversationHistory
-            };
-            
-            try {
-                const response = await fetch('/api/v1/chat', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                     body: JSON.stringify(payload)
-                });
-                
-                const result = await response.json();
-                
-                if (result.success) {
-                    const respText = result.response || '';
-                    const responses = respText.split('|||').map(r => r.trim()).filter(r => r);
-                    if (responses.length === 0) responses.push(respText);
-                     responses.forEach(resp => {
-                        messages.innerHTML += '<div class="message assistant">' + resp + '</div>';
-                      conversationHistory.push({ role: 'assistant', content: resp });
-                    });
-                     conversationHistory.push({ role: 'user', content: query });
-                } else {
-                     messages.innerHTML += '<div class="message assistant" style="background:#f8d7da; color:#721c24;">Error: ' + (result.error || 'Unknown error') + '</div>';
-                }
-            } catch (error) {
-                messages.innerHTML += '<div class="message assistant" style="background:#f8d7da; color:#721c24;">Failed to get response. Please try again.</div>';
-            }
-            
-            messages.scrollTop = messages.scrollHeight;
-            btn.disabled = false;
-            btn.textContent = 'Send';
-        }
-
-        // Initialize: Load characters when page loads
-        window.addEventListener('DOMContentLoaded', () => {
-            loadCharacters();
-        });
-    </script>
-</body>
-</html>
-'''
+# Components (no database) are created on first use, so workers that only
+# serve static routes and health checks never pay for them
+@functools.cache
+def get_astro():
+    return AstroEngine()
+
+@functools.cache
+def get_llm():
+    return EnhancedLLMBridge()  # Enhanced with caching, no DB
+
+
+def _json(payload, status=200):
+    """JSON response encoded straight to bytes with orjson (no jsonify round trip)"""
+    return _json_bytes(orjson.dumps(payload), status)
+
+def _json_bytes(body, status=200):
+    """JSON response for an already-encoded body"""
+    return Response(body, status=status, mimetype='application/json')
+
+def _error_body(message):
+    """Pre-encode the body of a fixed error response"""
+    return orjson.dumps({"success": False, "error": message})
+
+# Fixed error bodies, encoded once
+_ERR_AUTH = _error_body("Invalid or missing API key")
+_ERR_INVALID_BODY = _error_body("Invalid request body")
+_ERR_CHARACTER_TYPE = _error_body("character must be an object with id, name, age, experience, specialty, etc.")
+_ERR_BIRTH_DATE = _error_body("Invalid data format: birth_date must be DD/MM/YYYY")
+_ERR_BIRTH_TIME = _error_body("Invalid data format: birth_time must be HH:MM")
+_ERR_NOT_FOUND = _error_body("Not found")
+# 410 Gone bodies for the endpoints that went away with the database
+_ERR_GONE = _error_body("Database removed. Use /api/v1/chat with birth data in request.")
+_ERR_CHAT_GONE = _error_body(
+    "Database removed. Use /api/v1/chat with birth data in request. See /docs/ASTROVOICE_API.md for details."
+)
+
+def _precomputed_response(body, body_gz, mimetype, etag=None, max_age=None):
+    """Response for a constant body, sent gzipped when the client accepts it"""
+    if request.accept_encodings['gzip']:
+        response = Response(body_gz, mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+        # Each encoding is a different representation, so it needs its own validator
+        etag = etag and etag + '-gz'
+    else:
+        response = Response(body, mimetype=mimetype)
+    response.vary.add('Accept-Encoding')
+
+    if max_age is not None:
+        # Lets browsers, proxies and the CDN reuse the body without asking again
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    if etag:
+        response.set_etag(etag)
+        # 304 Not Modified when the browser already has this version
+        return response.make_conditional(request)
+    return response
+
+def _read_static(name):
+    """A frontend file with indentation and blank lines dropped (line breaks are kept,
+    so JS semicolon insertion and // comments behave as in the source)"""
+    with open(os.path.join(app.static_folder, name), 'rb') as f:
+        return b'\n'.join(line.strip() for line in f if line.strip())
+
+# The frontend's CSS/JS are served from memory, gzipped once, under a content
+# hash so browsers can keep them until they actually change.
+# name -> (body, gzipped body, md5 hex)
+_ASSET_MIMETYPES = {'astra.css': 'text/css', 'astra.js': 'text/javascript'}
+_ASSETS = {}
+for _name in _ASSET_MIMETYPES:
+    _body = _read_static(_name)
+    _ASSETS[_name] = (_body, gzip.compress(_body, compresslevel=9), hashlib.md5(_body).hexdigest())
+
+@app.route('/assets/<name>')
+def asset(name):
+    """Frontend stylesheet/script"""
+    if name not in _ASSETS:
+        return _json_bytes(_ERR_NOT_FOUND, 404)
+    body, body_gz, etag = _ASSETS[name]
+    # Only the fingerprinted URL the page links to is safe to cache for a year
+    fingerprinted = request.args.get('v') == etag[:12]
+    return _precomputed_response(
+        body, body_gz, _ASSET_MIMETYPES[name], etag=etag,
+        max_age=31536000 if fingerprinted else 0
+    )
+
+def _fingerprint_assets(page):
+    """Point the page's /assets/<name> links at ?v=<content hash>"""
+    for name, (_, _, etag) in _ASSETS.items():
+        url = f'/assets/{name}'.encode('utf-8')
+        page = page.replace(url, url + b'?v=' + etag[:12].encode('ascii'))
+    return page
+
+# Interactive frontend (static/index.html) - it has no template variables, so it's
+# read and compressed once here instead of being rendered per request
+_HOME_PAGE = _fingerprint_assets(_read_static('index.html'))
+_HOME_PAGE_GZ = gzip.compress(_HOME_PAGE, compresslevel=9)
+_HOME_PAGE_ETAG = hashlib.md5(_HOME_PAGE).hexdigest()
 
 @app.route('/')
 def home():
     """Welcome page with API documentation"""
-    return render_template_string(HOME_HTML)
+    return _precomputed_response(
+        _HOME_PAGE, _HOME_PAGE_GZ, 'text/html', etag=_HOME_PAGE_ETAG, max_age=86400
+    )
+
+# Load balancer health checks get constant bytes, no per-request encoding
+_HEALTH_BODY = orjson.dumps({
+    "status": "healthy",
+    "service": "ASTRA Vedic Astrology API",
+    "version": "1.0.0"
+})
 
 @app.route('/health')
 def health():
     """Health check endpoint"""
-    return jsonify({
-        "status": "healthy",
-        "service": "ASTRA Vedic Astrology API",
-        "version": "1.0.0"
-    })
+    response = _json_bytes(_HEALTH_BODY)
+    # A probe must reach the process - a cached "healthy" would hide an outage
+    response.cache_control.no_store = True
+    return response
 
 @app.route('/api/users', methods=['GET'])
 def list_users():
     """List all users - DEPRECATED (DB removed)"""
-    return jsonify({
-        "success": False,
-        "error": "Database removed. Use /api/v1/chat with birth data in request."
-    }), 410  # Gone
+    return _json_bytes(_ERR_GONE, 410)
 
 @app.route('/api/users', methods=['POST'])
 def create_user():
     """Create new user - DEPRECATED (DB removed)"""
-    return jsonify({
-        "success": False,
-        "error": "Database removed. Use /api/v1/chat with birth data in request."
-    }), 410  # Gone
+    return _json_bytes(_ERR_GONE, 410)
 
 @app.route('/api/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
     """Get user details - DEPRECATED (DB removed)"""
-    return jsonify({
-        "success": False,
-        "error": "Database removed. Use /api/v1/chat with birth data in request."
-    }), 410  # Gone
+    return _json_bytes(_ERR_GONE, 410)
+
+# Characters are static config - serialize the response body once at import
+_CHARACTERS_BODY = orjson.dumps({
+    "success": True,
+    "characters": get_all_characters()
+})
+_CHARACTERS_BODY_GZ = gzip.compress(_CHARACTERS_BODY, compresslevel=9)
+_CHARACTERS_ETAG = hashlib.md5(_CHARACTERS_BODY).hexdigest()
 
 @app.route('/api/characters', methods=['GET'])
 def get_characters():
     """Get all available character personas"""
-    try:
-        from src.utils.characters import get_all_characters
-
-        characters = get_all_characters()
-
-        return jsonify({
-            "success": True,
-            "characters": characters
-        })
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+    return _precomputed_response(
+        _CHARACTERS_BODY, _CHARACTERS_BODY_GZ, 'application/json',
+        etag=_CHARACTERS_ETAG, max_age=3600
+    )
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
     """Chat with Astra - DEPRECATED (DB removed). Use /api/v1/chat instead."""
-    return jsonify({
-        "success": False,
-        "error": "Database removed. Use /api/v1/chat with birth data in request. See /docs/ASTROVOICE_API.md for details."
-    }), 410  # Gone
+    return _json_bytes(_ERR_CHAT_GONE, 410)
 
 # ==================================================================
 # ASTROVOICE INTEGRATION API (v1)
@@ -552,24 +204,28 @@ def chat():
 
 # API Key for authentication (set in environment variable)
 ASTROVOICE_API_KEY = os.environ.get('ASTROVOICE_API_KEY', None)
+_ASTROVOICE_API_KEY_BYTES = ASTROVOICE_API_KEY.encode('utf-8') if ASTROVOICE_API_KEY else None
 
 def require_api_key(f):
     """Decorator to require API key for endpoints"""
-    from functools import wraps
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        # Skip auth if no API key is configured
-        if not ASTROVOICE_API_KEY:
-            return f(*args, **kwargs)
+    # No API key configured - auth is off, so the view is registered unwrapped
+    # and requests don't pay for an extra call frame
+    if not ASTROVOICE_API_KEY:
+        return f
 
+    @functools.wraps(f)
+    def decorated_function(*args, **kwargs):
         # Check for API key in header
-        api_key = request.headers.get('X-API-Key') or request.headers.get('Authorization', '').replace('Bearer ', '')
+        # Authorization is only read when there's no X-API-Key
+        api_key = request.headers.get('X-API-Key')
+        if not api_key:
+            api_key = request.headers.get('Authorization', '')
+            if api_key[:7] == 'Bearer ':
+                api_key = api_key[7:]
 
-        if not api_key or api_key != ASTROVOICE_API_KEY:
-            return jsonify({
-                "success": False,
-                "error": "Invalid or missing API key"
-            }), 401
+        # Constant-time compare so response timing doesn't leak the key
+        if not api_key or not hmac.compare_digest(api_key.encode('utf-8'), _ASTROVOICE_API_KEY_BYTES):
+            return _json_bytes(_ERR_AUTH, 401)
 
         return f(*args, **kwargs)
     return decorated_function
@@ -595,12 +251,13 @@ def health_check_v1():
     """
     try:
         # Check LLM availability
+        llm = get_llm()
         llm_status = "available" if llm and llm.client else "unavailable"
 
         # Check astro engine
-        astro_status = "ready" if astro else "unavailable"
+        astro_status = "ready" if get_astro() else "unavailable"
 
-        return jsonify({
+        return _json({
             "success": True,
             "status": "healthy",
             "services": {
@@ -610,11 +267,37 @@ def health_check_v1():
             "version": "1.0.0"
         })
     except Exception as e:
-        return jsonify({
+        return _json({
             "success": False,
             "status": "unhealthy",
             "error": str(e)
-        }), 500
+        }, 500)
+
+
+def _build_characters_v1_body():
+    """Serialized /api/v1/characters payload"""
+    characters_dict = get_all_characters()
+
+    # Convert to list format for easier consumption
+    characters_list = []
+    for char_id, char_info in characters_dict.items():
+        characters_list.append({
+            "id": char_id,
+            "name": char_info.get("name", "Unknown"),
+            "specialty": char_info.get("description", "General"),
+            "description": f"{char_info.get('name', 'Unknown')} - {char_info.get('description', 'General')} specialist"
+        })
+
+    return orjson.dumps({
+        "success": True,
+        "characters": characters_list,
+        "count": len(characters_list)
+    })
+
+# Characters are static config - built at import like /api/characters
+_CHARACTERS_V1_BODY = _build_characters_v1_body()
+_CHARACTERS_V1_BODY_GZ = gzip.compress(_CHARACTERS_V1_BODY, compresslevel=9)
+_CHARACTERS_V1_ETAG = hashlib.md5(_CHARACTERS_V1_BODY).hexdigest()
 
 
 @app.route('/api/v1/characters', methods=['GET'])
@@ -640,28 +323,115 @@ def get_characters_v1():
     }
     """
     try:
-        from src.utils.characters import get_all_characters
-        characters_dict = get_all_characters()
-
-        # Convert to list format for easier consumption
-        characters_list = []
-        for char_id, char_info in characters_dict.items():
-            characters_list.append({
-                "id": char_id,
-                "name": char_info.get("name", "Unknown"),
-                "specialty": char_info.get("description", "General"),
-                "description": f"{char_info.get('name', 'Unknown')} - {char_info.get('description', 'General')} specialist"
-            })
-
-        return jsonify({
-            "success": True,
-            "characters": characters_list,
-            "count": len(characters_list)
-        })
+        # No max-age: the endpoint is behind the API key, so shared caches stay out
+        # of it, but clients can still revalidate with If-None-Match
+        return _precomputed_response(
+            _CHARACTERS_V1_BODY, _CHARACTERS_V1_BODY_GZ, 'application/json', etag=_CHARACTERS_V1_ETAG
+        )
     except Exception as e:
-        logger.error(f"Failed to get characters: {e}")
-        return jsonify({"success": False, "error": str(e)}), 500
+        logger.error("Failed to get characters: %s", e)
+        return _json({"success": False, "error": str(e)}, 500)
+
+
+# Most recent history messages taken from a chat request. The bridge keeps
+# CONVERSATION_HISTORY_CAP of them and scores the overflow, so allow one extra window.
+MAX_HISTORY_MESSAGES = 2 * EnhancedLLMBridge.CONVERSATION_HISTORY_CAP
+
+# Required request fields, in the order they're reported when missing
+_CHAT_REQUIRED_FIELDS = (
+    'user_id', 'query', 'session_id', 'character',
+    'name', 'birth_date', 'birth_time', 'birth_location', 'timezone'
+)
+_CHARACTER_REQUIRED_FIELDS = ('id', 'name')
+
+def _chat_validation_error(body, is_msgpack, error):
+    """400 response for a body that didn't decode into a ChatRequest"""
+    # Only failed requests pay for this second, untyped decode
+    data = msgspec.msgpack.decode(body) if is_msgpack else msgspec.json.decode(body)
+    if not isinstance(data, dict):
+        return _json_bytes(_ERR_INVALID_BODY, 400)
+
+    # null counts as missing, as it always has
+    missing_fields = [field for field in _CHAT_REQUIRED_FIELDS if data.get(field) is None]
+    if missing_fields:
+        return _json({
+            "success": False,
+            "error": f"Missing required fields: {', '.join(missing_fields)}"
+        }, 400)
+
+    if not isinstance(data['character'], dict):
+        return _json_bytes(_ERR_CHARACTER_TYPE, 400)
+
+    return _json({"success": False, "error": f"Invalid data format: {error}"}, 400)
+
+# Voice clients sometimes resend the same transcribed query - the last reply per
+# conversation turn is kept briefly so a resend doesn't rerun the whole pipeline.
+# key -> (expires_at, encoded body), LRU ordered
+_REPEAT_CACHE_SIZE = 10000
+_REPEAT_CACHE_TTL = 30  # seconds
+_repeat_cache = OrderedDict()
+_repeat_lock = threading.Lock()
+
+# Whitespace and punctuation runs (ASCII, plus the danda, ellipsis and curly quotes
+# speech-to-text emits) - transcripts of the same utterance differ mostly in these.
+# Only safe because the key pins the turn: "yes?" and "Yes!" share a key solely when
+# they answer the same message
+_QUERY_NOISE_RE = re.compile(r"[\s!-/:-@\[-`{-~\u0964\u2026\u2018\u2019\u201c\u201d]+")
+
+def _repeat_key(req, character_id):
+    """
+    Cache key for a chat reply
 
+    Pins the conversation turn (history length and a digest of its last message, as
+    sent) plus everything else that shapes the reply, so only a resend of the same
+    turn hits - a short answer like "yes" to a new follow-up question doesn't.
+    Case, spacing and punctuation of the query don't count.
+    """
+    history = req.conversation_history
+    last_turn = hashlib.blake2b(history[-1], digest_size=16).digest() if history else b''
+    return (
+        req.session_id, character_id,
+        _QUERY_NOISE_RE.sub(' ', req.query).strip().casefold(), req.preferred_language,
+        req.name, req.birth_date, req.birth_time, req.birth_location, req.timezone,
+        len(history), last_turn
+    )
+
+def _cached_reply(key):
+    """Encoded reply for a query answered in the last _REPEAT_CACHE_TTL seconds, or None"""
+    with _repeat_lock:
+        entry = _repeat_cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            _repeat_cache.move_to_end(key)
+            return entry[1]
+    return None
+
+def _remember_reply(key, body):
+    """Keep an encoded reply for _cached_reply"""
+    with _repeat_lock:
+        _repeat_cache[key] = (time.monotonic() + _REPEAT_CACHE_TTL, body)
+        _repeat_cache.move_to_end(key)
+        while len(_repeat_cache) > _REPEAT_CACHE_SIZE:
+            _repeat_cache.popitem(last=False)
+
+# Successful /api/v1/chat body with its fixed keys pre-encoded; only the values are
+# serialized per request. Byte-for-byte what orjson.dumps gives for the dict:
+# {"success": True, "response": ..., "responses": [...],
+#  "character": {"id": ..., "name": ...}, "session_id": ...}
+_CHAT_REPLY_TEMPLATE = (
+    b'{"success":true,"response":%s,"responses":%s,'
+    b'"character":{"id":%s,"name":%s},"session_id":%s}'
+)
+
+def _chat_reply_body(response, character_id, character_name, session_id):
+    """Encoded chat reply - "responses" holds the reply's chat bubbles, already split"""
+    dumps = orjson.dumps
+    return _CHAT_REPLY_TEMPLATE % (
+        dumps(response), dumps(split_reply(response)),
+        dumps(character_id), dumps(character_name), dumps(session_id)
+    )
+
+_BIRTH_DATE_RE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})\Z')  # DD/MM/YYYY
+_BIRTH_TIME_RE = re.compile(r'(\d{1,2}):(\d{2})\Z')  # HH:MM
 
 @app.route('/api/v1/chat', methods=['POST'])
 # @require_api_key
@@ -670,6 +440,7 @@ def chat_v1():
     AstroVoice Integration Endpoint
 
     Receives birth data AND character data directly from AstroVoice.
+    The body is JSON, or msgpack when sent with Content-Type: application/msgpack.
 
     Request:
     {
@@ -710,7 +481,8 @@ def chat_v1():
     Response:
     {
         "success": true,
-        "response": "Achha Rahul, looking at your chart...",
+        "response": "Achha Rahul, looking at your chart...|||Kab se soch rahe ho?",
+        "responses": ["Achha Rahul, looking at your chart...", "Kab se soch rahe ho?"],
         "character": {
             "id": "marriage",
             "name": "Pandit Ravi Sharma"
@@ -719,107 +491,93 @@ def chat_v1():
     }
     """
     try:
-        data = request.json
-
-
-        # Validate REQUIRED fields
-        required_fields = [
-            'user_id', 'query', 'session_id', 'character',
-            'name', 'birth_date', 'birth_time', 'birth_location', 'timezone'
-        ]
-
-        missing_fields = [field for field in required_fields if field not in data or data[field] is None]
-
-        if missing_fields:
-            return jsonify({
-                "success": False,
-                "error": f"Missing required fields: {', '.join(missing_fields)}"
-            }), 400
+        # Decoded and type-checked in one call straight from the raw bytes
+        # (Flask doesn't need to keep its own copy of the body)
+        body = request.get_data(cache=False)
+        is_msgpack = request.mimetype == 'application/msgpack'
+        try:
+            req = (chat_request_msgpack if is_msgpack else chat_request_json).decode(body)
+        except msgspec.ValidationError as e:
+            return _chat_validation_error(body, is_msgpack, e)
+        except msgspec.DecodeError:
+            return _json_bytes(_ERR_INVALID_BODY, 400)
 
         # Extract data
-        user_id = data['user_id']
-        query = data['query']
-        session_id = data['session_id']
+        user_id = req.user_id
+        query = req.query
+        session_id = req.session_id
 
         # Character data from AstroVoice
-        character_data = data['character']
-        if not isinstance(character_data, dict):
-            return jsonify({
-                "success": False,
-                "error": "character must be an object with id, name, age, experience, specialty, etc."
-            }), 400
-
-        # Validate character has required fields
-        character_required = ['id', 'name']
-        missing_char_fields = [f for f in character_required if f not in character_data]
+        character_data = req.character
+        missing_char_fields = [f for f in _CHARACTER_REQUIRED_FIELDS if f not in character_data]
         if missing_char_fields:
-            return jsonify({
+            return _json({
                 "success": False,
                 "error": f"character missing required fields: {', '.join(missing_char_fields)}"
-            }), 400
+            }, 400)
 
         character_id = character_data['id']
         character_name = character_data['name']
-        character_age = character_data.get('age')
-        character_experience = character_data.get('experience')
-        character_specialty = character_data.get('specialty', 'General Vedic Astrology')
-        character_language_style = character_data.get('language_style', 'casual')
-        character_about = character_data.get('about', '')
 
-        # Optional: Conversation history for context
-        conversation_history = data.get('conversation_history', [])
+        # Same query resent within a few seconds - answer with the reply just sent
+        repeat_key = _repeat_key(req, character_id)
+        cached_body = _cached_reply(repeat_key)
+        if cached_body is not None:
+            return _json_bytes(cached_body)
 
-        for message in conversation_history:
+        # Optional: Conversation history for context
+        # Only the turns that are forwarded get decoded; each is a fresh dict, so
+        # its role can be sanitized in place (a non-object entry is a ValueError -> 400)
+        history_message = history_message_msgpack if is_msgpack else history_message_json
+        conversation_history = []
+        for raw in req.conversation_history[-MAX_HISTORY_MESSAGES:]:
+            message = history_message.decode(raw)
             if 'role' in message:
-                message['role'] = sanitize_role(message['role'])
+                message['role'] = ROLE_MAP.get(message['role'], 'user')
+            conversation_history.append(message)
 
         # Birth data
-        name = data['name']
-        birth_date = data['birth_date']
-        birth_time = data['birth_time']
-        birth_location = data['birth_location']
+        name = req.name
+        birth_date = req.birth_date
+        birth_time = req.birth_time
+        birth_location = req.birth_location
 
         result = get_coordinates(birth_location)
 
         if not result:
-            return jsonify({
+            return _json({
                 "success": False,
                 "error": f"Could not get coordinates for location: {birth_location}"
-            }), 400
+            }, 400)
 
         latitude, longitude = result
         # latitude = float(latitude)
         # longitude = float(longitude)
-        timezone = data['timezone']
+        timezone = req.timezone
         
         # Language preference (optional, defaults to Hinglish)
-        preferred_language = data.get('preferred_language', 'Hinglish')
+        preferred_language = req.preferred_language
 
         # Parse birth date (DD/MM/YYYY)
-        day, month, year = map(int, birth_date.split('/'))
+        date_match = _BIRTH_DATE_RE.match(birth_date)
+        if not date_match:
+            return _json_bytes(_ERR_BIRTH_DATE, 400)
+        day, month, year = int(date_match[1]), int(date_match[2]), int(date_match[3])
 
         # Parse birth time (HH:MM)
-        hour, minute = map(int, birth_time.split(':'))
+        time_match = _BIRTH_TIME_RE.match(birth_time)
+        if not time_match:
+            return _json_bytes(_ERR_BIRTH_TIME, 400)
+        hour, minute = int(time_match[1]), int(time_match[2])
 
-        # Create natal chart from provided data
-        natal_chart = astro.create_natal_chart(
+        # Natal and transit context (charts are cached per birth details / place)
+        natal_context, transit_context = get_astro().get_chart_context(
             name, year, month, day, hour, minute,
             birth_location, latitude, longitude, timezone
         )
 
-        # Get astrological context
-        natal_context = astro.build_natal_context(natal_chart)
-        transit_chart = astro.get_transit_chart(
-            birth_location, latitude, longitude, timezone
-        )
-        transit_context = astro.build_transit_context(transit_chart, natal_chart)
-
-        # Add language preference to character data
-        character_data_with_lang = character_data.copy()
-        character_data_with_lang['preferred_language'] = preferred_language
-        
         # Generate response with character data and conversation history
-        result = llm.generate_response(
+        result = get_llm().generate_response(
             user_id=user_id,
             user_query=query,
             natal_context=natal_context,
@@ -827,35 +585,61 @@ def chat_v1():
             session_id=session_id,
             character_id=character_id,
             conversation_history=conversation_history,
-            character_data=character_data_with_lang  # Pass full character data with language
+            character_data=character_data,
+            preferred_language=preferred_language
         )
 
         response = result['response']
 
-        return jsonify({
-            "success": True,
-            "response": response,
-            "character": {
-                "id": character_id,
-                "name": character_name
-            },
-            "session_id": session_id
-        })
+        body = _chat_reply_body(response, character_id, character_name, session_id)
+        _remember_reply(repeat_key, body)
+        return _json_bytes(body)
 
     except ValueError as e:
-        logger.error(f"Invalid data format: {e}")
-        return jsonify({
+        logger.warning("Invalid data format: %s", e)
+        return _json({
             "success": False,
             "error": f"Invalid data format: {str(e)}"
-        }), 400
+        }, 400)
 
     except Exception as e:
-        logger.error(f"AstroVoice chat endpoint failed: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"success": False, "error": str(e)}), 500
+        # Traceback goes through the logger instead of a separate stdout print
+        logger.exception("AstroVoice chat endpoint failed: %s", e)
+        return _json({"success": False, "error": str(e)}, 500)
+
+
+@app.route('/api/v1/chat/stream', methods=['POST'])
+# @require_api_key
+def chat_v1_stream():
+    """
+    AstroVoice chat as a Server-Sent Events stream
+
+    Same request body as /api/v1/chat. The stream opens immediately with an
+    ": accepted" comment, so clients and proxies aren't left waiting on a silent
+    socket while the charts and LLM reply are produced, then sends exactly one event
+    (the LLM bridge returns the reply whole, so there are no partial events):
+
+        event: message   data: <the /api/v1/chat success body>
+        event: error     data: <the /api/v1/chat error body>
+    """
+    def events():
+        yield ': accepted\n\n'
+        response = chat_v1()
+        event = b'message' if response.status_code == 200 else b'error'
+        # orjson never emits raw newlines, so the body fits on one data: line
+        yield b'event: ' + event + b'\ndata: ' + response.get_data() + b'\n\n'
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
 if __name__ == '__main__':
+    # Production WSGI server (deploys run gunicorn, see render.yaml)
+    from waitress import serve
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=False)
+    serve(app, host='0.0.0.0', port=port,
+          threads=int(os.environ.get('WAITRESS_THREADS', 8)),
+          ident=None)  # don't advertise the server in a Server: header
@@ -0,0 +1,36 @@
+"""
+orjson-backed JSON provider for the Flask apps
+"""
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Encode/decode Flask JSON (jsonify, request.json) with orjson"""
+
+    def _option(self, sort_keys=None, indent=None):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs) -> str:
+        # Types orjson doesn't know (Decimal, __html__ objects) fall back to Flask's encoder
+        option = self._option(kwargs.get('sort_keys'), kwargs.get('indent'))
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """jsonify() - orjson's bytes go straight into the response, no str round trip"""
+        obj = self._prepare_response_obj(args, kwargs)
+        # Same pretty-printing rule as Flask: indented in debug unless compact is set
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        option = self._option(indent=indent) | orjson.OPT_APPEND_NEWLINE
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option), mimetype=self.mimetype
+        )
@@ -0,0 +1,32 @@
+"""
+Typed request bodies for the v1 API, decoded and validated by msgspec
+"""
+
+from typing import Any, Dict, List, Optional, Union
+
+import msgspec
+
+
+class ChatRequest(msgspec.Struct):
+    """Body of POST /api/v1/chat (see chat_v1 for the documented format)"""
+    user_id: Union[int, str]
+    query: str
+    session_id: str
+    # Passed through to the LLM as-is, so it stays a dict (persona fields vary by client)
+    character: Dict[str, Any]
+    name: str
+    birth_date: str
+    birth_time: str
+    birth_location: str
+    timezone: str
+    preferred_language: Optional[str] = 'Hinglish'
+    # Only the newest turns are used, so entries are kept as undecoded bytes
+    # until chat_v1 picks them (decode with history_message_json/_msgpack)
+    conversation_history: List[msgspec.Raw] = []
+
+
+# Decoders are reusable and thread-safe - build them once
+chat_request_json = msgspec.json.Decoder(ChatRequest)
+chat_request_msgpack = msgspec.msgpack.Decoder(ChatRequest)
+history_message_json = msgspec.json.Decoder(Dict[str, Any])
+history_message_msgpack = msgspec.msgpack.Decoder(Dict[str, Any])
@@ -0,0 +1,231 @@
+let currentBirthData = null;   // { name, birth_date, birth_time, birth_location, timezone } - no database
+let currentSessionId = null;
+let selectedCharacter = 'general';
+let availableCharacters = {};
+let conversationHistory = [];  // for /api/v1/chat context
+
+// The script is deferred, so the DOM is already parsed when this runs
+const characterSelector = document.getElementById('character-selector');
+
+// Generate unique session ID
+function generateSessionId() {
+    // randomUUID only exists in secure contexts (HTTPS/localhost) - plain-HTTP LAN use falls back
+    if (window.crypto && crypto.randomUUID) {
+        return 'session_' + crypto.randomUUID();
+    }
+    return 'session_' + Date.now() + '_' + Math.random().toString(36).slice(2, 11);
+}
+
+// Load available characters
+async function loadCharacters() {
+    try {
+        console.log('Loading characters...');
+        const response = await fetch('/api/characters');
+        const result = await response.json();
+        console.log('Characters API response:', result);
+
+        if (result.success) {
+            availableCharacters = result.characters;
+            console.log('Available characters:', Object.keys(availableCharacters));
+            renderCharacterSelector();
+        } else {
+            console.error('Characters API failed:', result.error);
+            characterSelector.innerHTML = '<span style="color: red;">Failed to load characters</span>';
+        }
+    } catch (error) {
+        console.error('Failed to load characters:', error);
+        characterSelector.innerHTML = '<span style="color: red;">Error loading characters: ' + error.message + '</span>';
+    }
+}
+
+// Render character selector buttons
+function renderCharacterSelector() {
+    // Buttons are built off-DOM and swapped in together - one layout pass, not one per button
+    const frag = document.createDocumentFragment();
+
+    Object.keys(availableCharacters).forEach(charId => {
+        const char = availableCharacters[charId];
+        const btn = document.createElement('button');
+        btn.className = 'btn' + (charId === selectedCharacter ? ' active' : '');
+        btn.innerHTML = char.description;
+        btn.title = char.name;
+        btn.style.cssText = 'padding: 8px 16px; font-size: 14px; flex: 0 1 auto;' +
+                            (charId === selectedCharacter ? ' background: #667eea; color: white;' : ' background: white; color: #667eea; border: 2px solid #667eea;');
+        btn.onclick = () => selectCharacter(charId);
+        frag.appendChild(btn);
+    });
+    characterSelector.replaceChildren(frag);
+}
+
+// Select character
+function selectCharacter(charId) {
+    selectedCharacter = charId;
+    renderCharacterSelector();
+
+    currentSessionId = generateSessionId();
+    conversationHistory = [];
+    const char = availableCharacters[charId];
+    const messages = document.getElementById('chat-messages');
+     if (currentBirthData) {
+        messages.innerHTML = '<div class="alert info" style="font-size: 13px;">Now talking to: <strong>'+char.name+'</strong><br><small>Conversation reset.</small></div>';
+        messages.scrollTop = messages.scrollHeight;
+    }
+}
+
+function showTab(tab) {
+    document.querySelectorAll('.tab').forEach(t => t.classList.remove('active'));
+    document.querySelectorAll('.panel').forEach(p => p.classList.remove('active'));
+
+    const idx = { create: 0, users: 1, chat: 2 }[tab];
+    if (idx !== undefined) document.querySelectorAll('.tab')[idx].classList.add('active');
+    document.getElementById(tab + '-panel').classList.add('active');
+
+              if (tab === 'users') renderCurrentChart();
+}
+
+       function setBirthChart() {
+    var nameEl = document.getElementById('name');
+    var dateEl = document.getElementById('birth_date');
+    var timeEl = document.getElementById('birth_time');
+    var locationEl = document.getElementById('location');
+    var name = nameEl ? nameEl.value.trim() : '';
+    var birthDate = dateEl ? dateEl.value.trim() : '';
+    var birthTime = timeEl ? timeEl.value.trim() : '';
+    var birthLocation = locationEl ? locationEl.value.trim() : '';
+    if (!name || !birthDate || !birthTime || !birthLocation) {
+        var alertEl = document.getElementById('create-alert');
+        if (alertEl) alertEl.innerHTML = '<div class="alert error">Please fill in Name, Birth Date, Birth Time, and Birth Location.</div>';
+        return;
+    }
+    var tzEl = document.getElementById('timezone');
+    var timezone = (tzEl && tzEl.value && tzEl.value.trim()) ? tzEl.value.trim() : 'Asia/Kolkata';
+    currentBirthData = { name: name, birth_date: birthDate, birth_time: birthTime, birth_location: birthLocation, timezone: timezone };
+    conversationHistory = [];
+    currentSessionId = generateSessionId();
+    var alertEl = document.getElementById('create-alert');
+    if (alertEl) alertEl.innerHTML = '<div class="alert success">✓ Birth chart set! You can start chatting below.</div>';
+    var chatInput = document.getElementById('chat-input');
+    var chatBtn = document.getElementById('chat-btn');
+    if (chatInput) chatInput.disabled = false;
+    if (chatBtn) chatBtn.disabled = false;
+    showTab('chat');
+}
+document.getElementById('create-form').addEventListener('submit', function(e) { e.preventDefault(); setBirthChart(); });
+document.getElementById('create-btn').addEventListener('click', function() { setBirthChart(); });
+
+function renderCurrentChart() {
+
+    const list = document.getElementById('users-list');
+    const alert = document.getElementById('users-alert');
+
+    alert.innerHTML = '';
+
+    if (!currentBirthData) {
+        list.innerHTML = '<div class="alert info">Set your birth details in "Set Birth Chart" first.</div>';
+        return;
+    }
+    list.innerHTML = '<div class="user-card" style="pointer-events:none;">' +
+        '<strong>' + currentBirthData.name + '</strong><br>' +
+        '<small>Born: ' + currentBirthData.birth_date + ' ' + currentBirthData.birth_time + ' at ' + currentBirthData.birth_location + ' (' + currentBirthData.timezone + ')</small>' +
+        '</div>';
+}
+
+const HTML_ESCAPES = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
+
+// Escape text for string-built HTML
+function escapeHtml(s) {
+    return String(s).replace(/[&<>"']/g, c => HTML_ESCAPES[c]);
+}
+
+// Send Chat Message
+document.getElementById('chat-input').addEventListener('keypress', (e) => {
+    if (e.key === 'Enter') sendMessage();
+});
+
+async function sendMessage() {
+    if (!currentBirthData) {
+        document.getElementById('chat-alert').innerHTML = '<div class="alert error">Please set your birth chart first (Set Birth Chart tab).</div>';
+        return;
+    }
+    const char = availableCharacters[selectedCharacter];
+    if (!char) {
+        document.getElementById('chat-alert').innerHTML = '<div class="alert error">Please wait for characters to load.</div>';
+       return;
+    }
+
+    const input = document.getElementById('chat-input');
+    const messages = document.getElementById('chat-messages');
+    const btn = document.getElementById('chat-btn');
+    const query = input.value.trim();
+
+    if (!query) return;
+
+    // Add user message
+    messages.insertAdjacentHTML('beforeend', '<div class="message user">' + escapeHtml(query) + '</div>');
+    input.value = '';
+    messages.scrollTop = messages.scrollHeight;
+
+    btn.disabled = true;
+    btn.innerHTML = '<span class="loading"></span>';
+     const characterPayload = {
+        id: char.character_id || selectedCharacter,
+        name: char.name,
+        age: char.age,
+        experience: char.experience,
+        specialty: char.specialty || char.description,
+        language_style: char.language_style || 'casual',
+        about: char.about || ''
+    };
+    const payload = {
+        user_id: 1,
+        query: query,
+        session_id: currentSessionId,
+        character: characterPayload,
+        name: currentBirthData.name,
+        birth_date: currentBirthData.birth_date,
+        birth_time: currentBirthData.birth_time,
+        birth_location: currentBirthData.birth_location,
+        timezone: currentBirthData.timezone,
+        conversation_history: conversationHistory
+    };
+
+    const showError = (text) => {
+        messages.insertAdjacentHTML('beforeend', '<div class="message assistant" style="background:#f8d7da; color:#721c24;">' + escapeHtml(text) + '</div>');
+    };
+
+    try {
+        // Plain request: the LLM bridge returns the reply whole, so the stream
+        // endpoint wouldn't show the first bubble any sooner
+        const response = await fetch('/api/v1/chat', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(payload)
+        });
+
+        const result = await response.json();
+
+        if (result.success) {
+            // "responses" holds the reply already split into chat bubbles
+            const responses = result.responses && result.responses.length
+                ? result.responses : [result.response || ''];
+            responses.forEach(resp => {
+                messages.insertAdjacentHTML('beforeend', '<div class="message assistant">' + escapeHtml(resp) + '</div>');
+                conversationHistory.push({ role: 'assistant', content: resp });
+            });
+            conversationHistory.push({ role: 'user', content: query });
+        } else {
+            showError('Error: ' + (result.error || 'Unknown error'));
+        }
+    } catch (error) {
+        showError('Failed to get response. Please try again.');
+    }
+
+    messages.scrollTop = messages.scrollHeight;
+    btn.disabled = false;
+    btn.textContent = 'Send';
+}
+
+// Initialize: Load characters when page loads
+window.addEventListener('DOMContentLoaded', () => {
+    loadCharacters();
+});
@@ -1,6 +1,8 @@
 from kerykeion import AstrologicalSubject, KerykeionChartSVG, NatalAspects
+from collections import OrderedDict
 from datetime import datetime
 import pytz
+import threading
 import time
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
@@ -12,6 +14,10 @@ logger = setup_logger(__name__)
 
 
 class AstroEngine:
+    TRANSIT_BUCKET_SECONDS = 600  # transit charts are reused for this long per place
+    TRANSIT_CACHE_SIZE = 4096
+    NATAL_CACHE_SIZE = 1024  # chart objects are large - keep only active users' charts
+
     def __init__(self):
         # Nominatim for geocoding (free, no API key needed)
         self.geolocator = Nominatim(
@@ -20,6 +26,29 @@ class AstroEngine:
         )
         self.tf = TimezoneFinder()
 
+        # LRU ordered chart caches:
+        #   (lat, lon, tz, time bucket) -> (transit chart, header, position lines)
+        #   birth data -> (natal chart, natal context, natal aspect lines)
+        self._transit_cache = OrderedDict()
+        self._natal_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _cached(self, cache, limit, key, build):
+        """Return cache[key], calling build() and storing the result on a miss"""
+        with self._cache_lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+                return value
+
+        value = build()
+
+        with self._cache_lock:
+            cache[key] = value
+            while len(cache) > limit:
+                cache.popitem(last=False)
+        return value
+
     def get_location_data(self, location):
         """
         Get location coordinates using Nominatim (free geocoding).
@@ -78,6 +107,43 @@ class AstroEngine:
         )
         return subject
     
+    def _natal_entry(self, name, year, month, day, hour, minute, location, lat, lon, tz_str):
+        """
+        Natal chart, context string and aspect lines, memoized by birth data
+
+        All are pure functions of the birth details, so repeat messages in a
+        session skip the ephemeris work.
+        """
+        key = (name, year, month, day, hour, minute, location, round(lat, 4), round(lon, 4), tz_str)
+
+        def build():
+            natal_chart = self.create_natal_chart(
+                name, year, month, day, hour, minute, location, lat, lon, tz_str
+            )
+            # Aspects only depend on the natal chart, so they're worked out once here
+            # instead of on every build_transit_context call
+            return (natal_chart, self.build_natal_context(natal_chart),
+                    self._natal_aspect_lines(natal_chart))
+
+        return self._cached(self._natal_cache, self.NATAL_CACHE_SIZE, key, build)
+
+    def get_chart_context(self, name, year, month, day, hour, minute, location, lat, lon, tz_str):
+        """
+        Natal and transit context for one chat turn
+
+        Same text as build_natal_context + build_transit_context, but assembled
+        from the cached natal and transit entries, so a request only joins
+        pre-rendered lines.
+
+        Returns:
+            Tuple of (natal_context, transit_context)
+        """
+        _, natal_context, aspect_lines = self._natal_entry(
+            name, year, month, day, hour, minute, location, lat, lon, tz_str
+        )
+        _, header, position_lines = self._transit_entry(location, lat, lon, tz_str)
+        return natal_context, "\n".join((header, *aspect_lines, *position_lines))
+
     def get_chart_data(self, chart):
         """Extract chart data in a serializable format"""
         chart_data = {
@@ -111,6 +177,21 @@ class AstroEngine:
         return chart_data
     
     def get_transit_chart(self, location, lat, lon, tz_str):
+        """Current transit chart, shared by nearby requests within the same time bucket"""
+        return self._transit_entry(location, lat, lon, tz_str)[0]
+
+    def _transit_entry(self, location, lat, lon, tz_str):
+        # ~10 km grid: the context only reports planet positions, which don't depend on
+        # the observer's place. Old buckets are never asked for again and age out of the LRU
+        key = (round(lat, 1), round(lon, 1), tz_str, int(time.time() // self.TRANSIT_BUCKET_SECONDS))
+
+        def build():
+            transit_chart = self._create_transit_chart(location, lat, lon, tz_str)
+            return (transit_chart, *self._transit_lines(transit_chart))
+
+        return self._cached(self._transit_cache, self.TRANSIT_CACHE_SIZE, key, build)
+
+    def _create_transit_chart(self, location, lat, lon, tz_str):
         now = datetime.now(pytz.timezone(tz_str))
         transit = AstrologicalSubject(
             name="Transit",
@@ -229,9 +310,12 @@ class AstroEngine:
         return "\n".join(context_parts)
     
     def build_transit_context(self, transit_chart, natal_chart):
+        header, position_lines = self._transit_lines(transit_chart)
+        return "\n".join((header, *self._natal_aspect_lines(natal_chart), *position_lines))
+
+    def _natal_aspect_lines(self, natal_chart):
+        """Aspect lines of the transit context (tuple, so cache entries can't be mutated)"""
         context_parts = []
-        context_parts.append(f"\nCurrent Transits ({transit_chart.day}/{transit_chart.month}/{transit_chart.year}):")
-        
         try:
             aspects = NatalAspects(natal_chart)
             
@@ -240,13 +324,19 @@ class AstroEngine:
                     context_parts.append(f"{aspect['p1_name']} {aspect['aspect']} {aspect['p2_name']} (orb: {aspect['orbit']:.2f}°)")
         except Exception as e:
             context_parts.append(f"Aspects calculation unavailable")
+        return tuple(context_parts)
+
+    def _transit_lines(self, transit_chart):
+        """Header and planet position lines of the transit context"""
+        header = f"\nCurrent Transits ({transit_chart.day}/{transit_chart.month}/{transit_chart.year}):"
         
         planet_names = ['sun', 'moon', 'mercury', 'venus', 'mars', 'jupiter', 'saturn', 'uranus', 'neptune', 'pluto']
         
+        position_lines = []
         for planet_name in planet_names:
             if hasattr(transit_chart, planet_name):
                 planet = getattr(transit_chart, planet_name)
-                context_parts.append(f"Transit {planet_name.capitalize()} at {planet.get('position', 0):.1f}° in {planet.get('sign', 'Unknown')}")
+                position_lines.append(f"Transit {planet_name.capitalize()} at {planet.get('position', 0):.1f}° in {planet.get('sign', 'Unknown')}")
         
-        return "\n".join(context_parts)
+        return header, tuple(position_lines)
     
\ No newline at end of file
@@ -397,7 +397,8 @@ class LLMBridge:
     def generate_response(self, user_id: int = None, user_query: str = None,
                          natal_context: str = None, transit_context: str = "",
                          session_id: str = None, conversation_history: list = None,
-                         character_id: str = "general", character_data: dict = None):
+                         character_id: str = "general", character_data: dict = None,
+                         preferred_language: str = None):
         """
         Generate response with optional caching
 
@@ -412,6 +413,7 @@ class LLMBridge:
             conversation_history: Conversation history (for non-caching mode)
             character_id: Character persona to use (general, career, love, health, finance, family, spiritual)
             character_data: Character data from AstroVoice (name, age, experience, specialty, etc.)
+            preferred_language: Language the user chose (falls back to character_data['preferred_language'])
 
         Returns:
             Dictionary with response and cache stats OR just response string
@@ -473,8 +475,9 @@ class LLMBridge:
                 transit_context=transit_context,
                 user_query=user_query,
                 conversation_history=history_to_send if history_to_send else (conversation_history or []),
-                 character_id=character_id,
-                character_data=character_data
+                character_id=character_id,
+                character_data=character_data,
+                preferred_language=preferred_language
             )
 
             # Return dict format for consistency
@@ -1592,7 +1595,7 @@ class LLMBridge:
             self.conversation_state["conversation_stage"] = "detailed"
     
 
-    def _generate_original(self, natal_context, transit_context, user_query, conversation_history=None, character_id="general", character_data: dict = None):
+    def _generate_original(self, natal_context, transit_context, user_query, conversation_history=None, character_id="general", character_data: dict = None, preferred_language: str = None):
         """Main method to generate intelligent responses"""
 
         # Get character info from passed character_data (from AstroVoice)
@@ -1600,15 +1603,16 @@ class LLMBridge:
         if character_data:
             character_name = character_data.get('name', 'Astra')
             character_desc = character_data.get('specialty') or character_data.get('about', 'astrology consultant')
-            # Extract preferred language from character_data
-            preferred_language = character_data.get('preferred_language', 'Hinglish')
+            # Older callers put the preferred language inside character_data
+            if not preferred_language:
+                preferred_language = character_data.get('preferred_language', 'Hinglish')
         else:
             # Fallback to hardcoded characters
             from src.utils.characters import get_character
             character = get_character(character_id)
             character_name = character.name if character else "Astra"
             character_desc = character.description if character else "astrology consultant"
-            preferred_language = "Hinglish"
+            preferred_language = preferred_language or "Hinglish"
 
         # Character-specific system prompt will be built in the try block below
 
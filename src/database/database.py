@@ -1,12 +1,17 @@
 import sqlite3
 import json
-from datetime import datetime
+import time
 
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 
+def _iso_now():
+    """Current UTC time as an ISO-8601 string (second precision)"""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
 class UserDatabase:
     def __init__(self, db_name):
         self.db_name = db_name
@@ -64,7 +69,7 @@ class UserDatabase:
         cursor.execute('''
             INSERT INTO users (name, birth_date, birth_time, birth_location, latitude, longitude, timezone, natal_chart, created_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (name, birth_date, birth_time, birth_location, latitude, longitude, timezone, json.dumps(natal_chart), datetime.now().isoformat()))
+        ''', (name, birth_date, birth_time, birth_location, latitude, longitude, timezone, json.dumps(natal_chart), _iso_now()))
         user_id = cursor.lastrowid
         conn.commit()
         conn.close()
@@ -86,13 +91,58 @@ class UserDatabase:
         conn.close()
         return users
     
+    def count_users(self):
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM users')
+        count = cursor.fetchone()[0]
+        conn.close()
+        return count
+
+    def iter_all_users_full(self, batch_size=1000):
+        """Yield every full user row (same columns as get_user) from a single query"""
+        conn = sqlite3.connect(self.db_name)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT user_id, name, birth_date, birth_time, birth_location,
+                       latitude, longitude, timezone, natal_chart, created_at
+                FROM users
+                ORDER BY user_id
+            ''')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def iter_all_conversation_history(self, batch_size=1000):
+        """Yield (user_id, query, response) for every conversation, grouped by user in chronological order"""
+        conn = sqlite3.connect(self.db_name)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT user_id, query, response
+                FROM conversations
+                ORDER BY user_id, conv_id
+            ''')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
     def add_conversation(self, user_id, query, response):
         conn = sqlite3.connect(self.db_name)
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO conversations (user_id, query, response, timestamp)
             VALUES (?, ?, ?, ?)
-        ''', (user_id, query, response, datetime.now().isoformat()))
+        ''', (user_id, query, response, _iso_now()))
         conn.commit()
         conn.close()
     
@@ -176,7 +226,7 @@ class UserDatabase:
             conn.close()
             return False
 
-        values.append(datetime.now().isoformat())
+        values.append(_iso_now())
         values.append(character_id)
 
         query = f"UPDATE characters SET {', '.join(fields)}, updated_at = ? WHERE character_id = ?"
@@ -189,6 +239,44 @@ class UserDatabase:
             logger.info(f"Updated character: {character_id}")
         return updated
 
+    def bulk_save_characters(self, inserts, updates):
+        """
+        Insert and update many characters in a single transaction
+
+        Args:
+            inserts: Rows of (character_id, name, emoji, about, age, experience, specialty, language_style)
+            updates: Rows in the same order, matched on character_id
+
+        Returns:
+            Tuple of (inserted_count, updated_count)
+        """
+        conn = sqlite3.connect(self.db_name)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.executemany('''
+                INSERT OR IGNORE INTO characters (character_id, name, emoji, about, age, experience, specialty, language_style)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', inserts)
+            inserted = cursor.rowcount if inserts else 0
+
+            now = _iso_now()
+            cursor.executemany('''
+                UPDATE characters
+                SET name = ?, emoji = ?, about = ?, age = ?, experience = ?, specialty = ?,
+                    language_style = ?, updated_at = ?
+                WHERE character_id = ?
+            ''', [(*row[1:], now, row[0]) for row in updates])
+            updated = cursor.rowcount if updates else 0
+
+            conn.commit()
+            return inserted, updated
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
     def get_character(self, character_id):
         """Get a single character by ID"""
         conn = sqlite3.connect(self.db_name)
@@ -202,6 +290,15 @@ class UserDatabase:
             return dict(character)
         return None
 
+    def get_all_character_ids(self):
+        """Get the set of all character IDs (active and inactive)"""
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        cursor.execute('SELECT character_id FROM characters')
+        character_ids = {row[0] for row in cursor}
+        conn.close()
+        return character_ids
+
     def get_all_characters(self, active_only=True):
         """Get all characters from database"""
         conn = sqlite3.connect(self.db_name)
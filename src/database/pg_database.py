@@ -4,8 +4,9 @@ Provides PostgreSQL support with fallback to SQLite for development
 """
 
 import psycopg2
-from psycopg2.extras import RealDictCursor, Json
-from psycopg2.pool import SimpleConnectionPool
+from psycopg2.extras import RealDictCursor, Json, execute_values
+from psycopg2.pool import ThreadedConnectionPool
+import io
 import json
 from datetime import datetime
 from typing import List, Dict, Optional
@@ -15,6 +16,22 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Characters that must be backslash-escaped in COPY text format
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _copy_buffer(rows) -> io.StringIO:
+    """Encode rows as a COPY ... FROM STDIN text-format stream (None becomes NULL)"""
+    buf = io.StringIO()
+    for row in rows:
+        buf.write('\t'.join(
+            '\\N' if value is None else str(value).translate(_COPY_ESCAPES)
+            for value in row
+        ))
+        buf.write('\n')
+    buf.seek(0)
+    return buf
+
 
 
 class PostgreSQLDatabase:
@@ -24,7 +41,7 @@ class PostgreSQLDatabase:
 
     def __init__(self, connection_url: str, min_conn=1, max_conn=10):
         """
-        Initialize PostgreSQL connection pool
+        Initialize PostgreSQL connection pool (thread-safe, shared by all calls on this instance)
 
         Args:
             connection_url: PostgreSQL connection URL from Render
@@ -32,24 +49,81 @@ class PostgreSQLDatabase:
             max_conn: Maximum connections in pool
         """
         self.connection_url = connection_url
+        self._tx_conn = None  # connection pinned by begin()
         try:
-            self.pool = SimpleConnectionPool(
+            self.pool = ThreadedConnectionPool(
                 min_conn,
                 max_conn,
                 connection_url
             )
             logger.info("PostgreSQL connection pool created successfully")
         except Exception as e:
-            logger.error("Failed to create PostgreSQL connection pool: {e}")
+            logger.error("Failed to create PostgreSQL connection pool: %s", e)
             raise
 
     def _get_conn(self):
-        """Get connection from pool"""
+        """Get connection from pool (the begin() connection while a transaction is open)"""
+        if self._tx_conn is not None:
+            return self._tx_conn
         return self.pool.getconn()
 
     def _put_conn(self, conn):
         """Return connection to pool"""
-        self.pool.putconn(conn)
+        if conn is not self._tx_conn:
+            self.pool.putconn(conn)
+
+    def _commit(self, conn):
+        """Commit, unless the work belongs to an open begin() transaction"""
+        if conn is not self._tx_conn:
+            conn.commit()
+
+    def _rollback(self, conn):
+        """Roll back, unless the work belongs to an open begin() transaction"""
+        if conn is not self._tx_conn:
+            conn.rollback()
+
+    # ==================================================================
+    # EXPLICIT TRANSACTIONS
+    # ==================================================================
+
+    def begin(self, synchronous_commit: bool = True):
+        """
+        Run every following call in one transaction until commit() or rollback()
+
+        Intended for single-threaded batch jobs such as the SQLite migration:
+        all methods share one pooled connection and nothing is committed in between.
+
+        Args:
+            synchronous_commit: False skips waiting for the WAL flush on COMMIT
+                                (a crash may lose the transaction, never corrupt it)
+        """
+        if self._tx_conn is not None:
+            raise RuntimeError("Transaction already in progress")
+
+        conn = self.pool.getconn()
+        if not synchronous_commit:
+            cursor = conn.cursor()
+            cursor.execute("SET LOCAL synchronous_commit = OFF")
+            cursor.close()
+        self._tx_conn = conn
+
+    def commit(self):
+        """Commit the transaction opened by begin()"""
+        conn, self._tx_conn = self._tx_conn, None
+        try:
+            conn.commit()
+        finally:
+            self.pool.putconn(conn)
+
+    def rollback(self):
+        """Discard the transaction opened by begin()"""
+        conn, self._tx_conn = self._tx_conn, None
+        if conn is None:
+            return
+        try:
+            conn.rollback()
+        finally:
+            self.pool.putconn(conn)
 
     def init_db(self):
         """Initialize database schema from schema.sql"""
@@ -63,12 +137,12 @@ class PostgreSQLDatabase:
                 schema_sql = f.read()
 
             cursor.execute(schema_sql)
-            conn.commit()
+            self._commit(conn)
             logger.info("Database schema initialized successfully")
 
         except Exception as e:
-            conn.rollback()
-            logger.error("Error initializing database: {e}")
+            self._rollback(conn)
+            logger.error("Error initializing database: %s", e)
             raise
         finally:
             cursor.close()
@@ -119,17 +193,77 @@ class PostgreSQLDatabase:
             ))
 
             user_id = cursor.fetchone()[0]
-            conn.commit()
+            self._commit(conn)
 
             # Create user profile
             self._create_user_profile(cursor, user_id, conn)
 
-            logger.info("User created with ID: {user_id}")
+            logger.info("User created with ID: %s", user_id)
             return user_id
 
         except Exception as e:
-            conn.rollback()
-            logger.error("Error adding user: {e}")
+            self._rollback(conn)
+            logger.error("Error adding user: %s", e)
+            raise
+        finally:
+            cursor.close()
+            self._put_conn(conn)
+
+    def bulk_add_users(self, users: List[tuple]) -> List[int]:
+        """
+        Add many users through COPY (no per-row INSERT parsing)
+
+        Args:
+            users: Tuples of (name, birth_date DD/MM/YYYY, birth_time, birth_location,
+                   latitude, longitude, timezone, natal_chart JSON text)
+
+        Returns:
+            New user IDs, in the same order as the input rows
+        """
+        if not users:
+            return []
+
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+
+            # Reserve IDs up front so COPY can write them and the caller keeps the mapping
+            cursor.execute("""
+            SELECT nextval(pg_get_serial_sequence('users', 'user_id'))
+            FROM generate_series(1, %s)
+            """, (len(users),))
+            user_ids = [row[0] for row in cursor.fetchall()]
+
+            rows = []
+            for user_id, (name, birth_date, birth_time, birth_location,
+                          latitude, longitude, timezone, natal_chart_json) in zip(user_ids, users):
+                # Convert DD/MM/YYYY to YYYY-MM-DD for PostgreSQL DATE type
+                day, month, year = birth_date.split('/')
+                rows.append((
+                    user_id, name, f"{year}-{month}-{day}", birth_time, birth_location,
+                    latitude, longitude, timezone, natal_chart_json  # parsed by the jsonb column
+                ))
+
+            cursor.copy_expert("""
+            COPY users (
+                user_id, name, birth_date, birth_time, birth_location,
+                latitude, longitude, timezone, natal_chart
+            ) FROM STDIN
+            """, _copy_buffer(rows))
+
+            # Create user profiles
+            cursor.copy_expert(
+                "COPY user_profiles (user_id, preferred_language, interaction_count) FROM STDIN",
+                _copy_buffer((user_id, 'hinglish', 0) for user_id in user_ids)
+            )
+
+            self._commit(conn)
+            logger.info("Created %d users", len(user_ids))
+            return user_ids
+
+        except Exception as e:
+            self._rollback(conn)
+            logger.error("Error adding users: %s", e)
             raise
         finally:
             cursor.close()
@@ -143,7 +277,7 @@ class PostgreSQLDatabase:
         ON CONFLICT (user_id) DO NOTHING
         """
         cursor.execute(query, (user_id, 'hinglish', 0))
-        conn.commit()
+        self._commit(conn)
 
     def get_user(self, user_id: int) -> Optional[tuple]:
         """
@@ -214,6 +348,18 @@ class PostgreSQLDatabase:
             cursor.close()
             self._put_conn(conn)
 
+    def count_users(self) -> int:
+        """Number of users, counted in the database"""
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM users")
+            return cursor.fetchone()[0]
+
+        finally:
+            cursor.close()
+            self._put_conn(conn)
+
     # ==================================================================
     # CONVERSATION MANAGEMENT
     # ==================================================================
@@ -247,11 +393,68 @@ class PostgreSQLDatabase:
             # Insert assistant message
             cursor.execute(query_sql, (user_id, session_id, 'assistant', response))
 
-            conn.commit()
+            self._commit(conn)
 
         except Exception as e:
-            conn.rollback()
-            logger.error("Error adding conversation: {e}")
+            self._rollback(conn)
+            logger.error("Error adding conversation: %s", e)
+            raise
+        finally:
+            cursor.close()
+            self._put_conn(conn)
+
+    def bulk_add_conversations(self, conversations: List[tuple]) -> int:
+        """
+        Add many conversation exchanges in one transaction through COPY
+
+        Args:
+            conversations: Tuples of (user_id, query, response, session_id)
+
+        Returns:
+            Number of exchanges added
+        """
+        if not conversations:
+            return 0
+
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+
+            rows = []
+            for user_id, query, response, session_id in conversations:
+                rows.append((user_id, session_id, 'user', query))
+                rows.append((user_id, session_id, 'assistant', response))
+
+            # COPY into a staging table, then insert in input order with
+            # clock_timestamp() (not NOW()) so messages keep their order inside the transaction
+            cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS conversations_stage (
+                seq SERIAL,
+                user_id INTEGER,
+                session_id TEXT,
+                role TEXT,
+                content TEXT
+            ) ON COMMIT DELETE ROWS
+            """)
+            # Earlier batches of the same transaction may still be staged
+            cursor.execute("TRUNCATE conversations_stage")
+            cursor.copy_expert(
+                "COPY conversations_stage (user_id, session_id, role, content) FROM STDIN",
+                _copy_buffer(rows)
+            )
+            cursor.execute("""
+            INSERT INTO conversations (user_id, session_id, role, content, timestamp)
+            SELECT user_id, session_id, role, content, clock_timestamp()
+            FROM conversations_stage
+            ORDER BY seq
+            """)
+
+            self._commit(conn)
+            return len(conversations)
+
+        except Exception as e:
+            self._rollback(conn)
+            logger.error("Error adding conversations: %s", e)
             raise
         finally:
             cursor.close()
@@ -376,12 +579,12 @@ class PostgreSQLDatabase:
             ))
 
             fact_id = cursor.fetchone()[0]
-            conn.commit()
+            self._commit(conn)
             return fact_id
 
         except Exception as e:
-            conn.rollback()
-            logger.error("Error adding user fact: {e}")
+            self._rollback(conn)
+            logger.error("Error adding user fact: %s", e)
             raise
         finally:
             cursor.close()
@@ -461,11 +664,11 @@ class PostgreSQLDatabase:
                 cache_hit_rate, cost_saved
             ))
 
-            conn.commit()
+            self._commit(conn)
 
         except Exception as e:
-            conn.rollback()
-            logger.error("Error logging cache performance: {e}")
+            self._rollback(conn)
+            logger.error("Error logging cache performance: %s", e)
         finally:
             cursor.close()
             self._put_conn(conn)
@@ -485,11 +688,11 @@ class PostgreSQLDatabase:
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
             """
             cursor.execute(query, (character_id, name, emoji, about, age, experience, specialty, language_style))
-            conn.commit()
+            self._commit(conn)
             logger.info(f"Added character: {character_id} - {name}")
             return True
         except Exception as e:
-            conn.rollback()
+            self._rollback(conn)
             if 'duplicate key' in str(e).lower() or 'unique constraint' in str(e).lower():
                 logger.warning(f"Character {character_id} already exists")
                 return False
@@ -521,7 +724,7 @@ class PostgreSQLDatabase:
 
             query = f"UPDATE characters SET {', '.join(fields)}, updated_at = %s WHERE character_id = %s"
             cursor.execute(query, values)
-            conn.commit()
+            self._commit(conn)
             updated = cursor.rowcount > 0
 
             if updated:
@@ -529,13 +732,60 @@ class PostgreSQLDatabase:
             return updated
 
         except Exception as e:
-            conn.rollback()
+            self._rollback(conn)
             logger.error(f"Error updating character: {e}")
             raise
         finally:
             cursor.close()
             self._put_conn(conn)
 
+    def bulk_save_characters(self, inserts, updates):
+        """
+        Insert and update many characters in a single transaction
+
+        Args:
+            inserts: Rows of (character_id, name, emoji, about, age, experience, specialty, language_style)
+            updates: Rows in the same order, matched on character_id
+
+        Returns:
+            Tuple of (inserted_count, updated_count)
+        """
+        template = "(%s, %s, %s, %s, %s::integer, %s::integer, %s, %s)"
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+
+            inserted = updated = 0
+            if inserts:
+                inserted = len(execute_values(cursor, """
+                INSERT INTO characters (character_id, name, emoji, about, age, experience, specialty, language_style)
+                VALUES %s
+                ON CONFLICT (character_id) DO NOTHING
+                RETURNING character_id
+                """, inserts, template=template, fetch=True))
+
+            if updates:
+                updated = len(execute_values(cursor, """
+                UPDATE characters AS c SET
+                    name = v.name, emoji = v.emoji, about = v.about, age = v.age,
+                    experience = v.experience, specialty = v.specialty,
+                    language_style = v.language_style, updated_at = NOW()
+                FROM (VALUES %s) AS v (character_id, name, emoji, about, age, experience, specialty, language_style)
+                WHERE c.character_id = v.character_id
+                RETURNING c.character_id
+                """, updates, template=template, fetch=True))
+
+            self._commit(conn)
+            return inserted, updated
+
+        except Exception as e:
+            self._rollback(conn)
+            logger.error(f"Error saving characters: {e}")
+            raise
+        finally:
+            cursor.close()
+            self._put_conn(conn)
+
     def get_character(self, character_id):
         """Get a single character by ID"""
         conn = self._get_conn()
@@ -552,6 +802,18 @@ class PostgreSQLDatabase:
             cursor.close()
             self._put_conn(conn)
 
+    def get_all_character_ids(self):
+        """Get the set of all character IDs (active and inactive)"""
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT character_id FROM characters')
+            return {row[0] for row in cursor}
+
+        finally:
+            cursor.close()
+            self._put_conn(conn)
+
     def get_all_characters(self, active_only=True):
         """Get all characters from database"""
         conn = self._get_conn()
@@ -584,7 +846,7 @@ class PostgreSQLDatabase:
         try:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM characters WHERE character_id = %s', (character_id,))
-            conn.commit()
+            self._commit(conn)
             deleted = cursor.rowcount > 0
 
             if deleted:
@@ -592,7 +854,7 @@ class PostgreSQLDatabase:
             return deleted
 
         except Exception as e:
-            conn.rollback()
+            self._rollback(conn)
             logger.error(f"Error deleting character: {e}")
             raise
         finally:
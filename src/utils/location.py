@@ -1,7 +1,12 @@
+from geopy.adapters import RequestsAdapter
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 from typing import Optional, Tuple
+from collections import OrderedDict
+from functools import partial
 import re
+import threading
+import time
 
 # Fallback coordinates for common Indian cities (when Nominatim fails)
 _CITY_FALLBACKS = {
@@ -29,6 +34,21 @@ _CITY_FALLBACKS = {
 }
 
 
+# Nominatim results, keyed by normalized location: key -> (expires_at, coords), LRU ordered
+_GEOCODE_CACHE_SIZE = 10000
+_GEOCODE_CACHE_TTL = 86400  # seconds
+_geocode_cache = OrderedDict()
+_geocode_lock = threading.Lock()
+
+# One geocoder for the process - its requests.Session keeps Nominatim connections
+# alive, so lookups after the first skip the TCP/TLS handshake
+_geolocator = Nominatim(
+    user_agent="astra_astrology",
+    timeout=10,
+    adapter_factory=partial(RequestsAdapter, pool_connections=64, pool_maxsize=64, max_retries=2),
+)
+
+
 def _normalize_for_lookup(s: str) -> str:
     """Lowercase and strip for lookup."""
     return re.sub(r"\s+", " ", s.strip().lower())
@@ -55,8 +75,26 @@ def get_coordinates(location: str) -> Optional[Tuple[float, float]]:
         if city_name in loc_lower:
             return coords
 
-    # 3) Try Nominatim
-    geolocator = Nominatim(user_agent="astra_astrology", timeout=10)
+    # 3) Try Nominatim (memoized - repeat locations skip the network call)
+    with _geocode_lock:
+        entry = _geocode_cache.get(loc_lower)
+        if entry and entry[0] > time.monotonic():
+            _geocode_cache.move_to_end(loc_lower)
+            return entry[1]
+
+    coords = _geocode(loc)
+    # Failures aren't cached so a timed-out lookup is retried next time
+    if coords:
+        with _geocode_lock:
+            _geocode_cache[loc_lower] = (time.monotonic() + _GEOCODE_CACHE_TTL, coords)
+            _geocode_cache.move_to_end(loc_lower)
+            while len(_geocode_cache) > _GEOCODE_CACHE_SIZE:
+                _geocode_cache.popitem(last=False)
+    return coords
+
+
+def _geocode(loc: str) -> Optional[Tuple[float, float]]:
+    """Look a location up with Nominatim, retrying with just the city part."""
     queries_to_try = [loc]
     if "," in loc:
         queries_to_try.append(loc.split(",")[0].strip())
@@ -64,7 +102,7 @@ def get_coordinates(location: str) -> Optional[Tuple[float, float]]:
         if not query:
             continue
         try:
-            result = geolocator.geocode(query)
+            result = _geolocator.geocode(query)
             if result:
                 return result.latitude, result.longitude
         except (GeocoderTimedOut, GeocoderServiceError):
@@ -1,4 +1,21 @@
+# Chat role -> role the LLM API accepts; anything not listed becomes 'user'
+ROLE_MAP = {
+    'system': 'system',
+    'assistant': 'assistant',
+    'user': 'user',
+    'function': 'function',
+    'tool': 'tool',
+    'developer': 'developer',
+    'astrologer': 'assistant',
+    'astra': 'assistant',
+    'bot': 'assistant',
+}
+
+
 def sanitize_role(role):
-    if role in ['astrologer', 'astra', 'bot']:
-        return 'assistant'
-    return role if role in ['system', 'assistant', 'user', 'function', 'tool', 'developer'] else 'user'
+    return ROLE_MAP.get(role, 'user')
+
+
+def split_reply(text):
+    """Chat bubbles of an LLM reply - the model separates them with |||"""
+    return [part for part in map(str.strip, text.split('|||')) if part]
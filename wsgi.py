@@ -0,0 +1,15 @@
+"""
+WSGI entry point for gunicorn's gevent workers
+
+gevent has to patch the standard library before anything creates sockets,
+locks or threads (the OpenAI/httpx client, geopy's session, the app's caches),
+so the patch runs here, ahead of the app import.
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+from run_app import app  # noqa: E402
+
+__all__ = ['app']